@@ -0,0 +1,241 @@
+import asyncio
+import time
+from collections import Counter
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from dedup import DocumentDeduplicator
+from lambda_function import (CommentCursor, cfg, comment_documents, configure_comment_fetch, get_date_window,
+                             get_lookback_start, get_reddit_settings, is_before_window, post_documents,
+                             replace_more_budget, report_incomplete_listing, select_top_comments)
+from pipeline import Document, TrendAggregator, normalize_document
+from reddit_fixtures import FixtureRecorder
+from timing import span, timed_aiter
+
+# Mention counts per day, posts analyzed and weighted metric sums per day, as from lambda_function.analyze_subreddit
+SubredditResult = Tuple[Dict[date, Counter], int, Dict[date, Dict[str, Counter]]]
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket shared by all coroutines issuing Reddit requests.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: int):
+        """
+        Args:
+            requests_per_minute: Sustained request rate allowed
+            burst: Number of requests that may be issued back to back
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """
+        Wait until a request slot is available.
+        """
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def fetch_top_comments_async(post: Any, window_start: int, window_end: int, semaphore: asyncio.Semaphore,
+                                   rate_limiter: AsyncRateLimiter,
+                                   cursor: Optional[CommentCursor] = None) -> List[Any]:
+    """
+    Hydrate a submission's comment forest and select its top comments by score among those written inside the window.
+
+    Args:
+        post: asyncpraw submission from a listing
+        window_start: Window start as a UTC timestamp
+        window_end: Window end (exclusive) as a UTC timestamp
+        semaphore: Bounds the number of in-flight comment fetches
+        rate_limiter: Limiter shared by all concurrent fetches
+        cursor: Comment cursor to advance once the fetch succeeds
+
+    Returns:
+        List[Any]: Up to TOP_COMMENTS_LIMIT comments, empty if the fetch failed
+    """
+    async with semaphore:
+        try:
+            with span('rate_limit_wait'):
+                await rate_limiter.acquire()
+            with span('comment_fetch'):
+                configure_comment_fetch(post, window_start, post.created_utc)
+                await post.load()
+                await post.comments.replace_more(**replace_more_budget())
+            comments = post.comments.list()
+            if cursor is not None:
+                cursor.update(post, comments)
+            return select_top_comments(comments, window_start, window_end)
+        except Exception as e:
+            print(f"Error processing comments for post {post.id}: {str(e)}")
+            return []
+
+
+async def iter_subreddit_documents_async(reddit: Any, subreddit_name: str, start_date: date, end_date: date,
+                                        semaphore: asyncio.Semaphore, rate_limiter: AsyncRateLimiter,
+                                        cursor: Optional[CommentCursor] = None,
+                                        truncated_listings: Optional[Dict[str, float]] = None
+                                        ) -> AsyncIterator[Document]:
+    """
+    Async document source: stream a subreddit's posts and top comments inside a date range.
+
+    Comment fetches start as soon as each post arrives, overlapping listing
+    paging, with a bounded number of fetches outstanding. Posts from the
+    COMMENT_LOOKBACK_DAYS are handled as in lambda_function.iter_subreddit_documents.
+
+    Args:
+        reddit: asyncpraw client
+        subreddit_name: Name of the subreddit to read
+        start_date: First day to include
+        end_date: Last day to include
+        semaphore: Bounds the number of in-flight comment fetches
+        rate_limiter: Limiter shared by all concurrent fetches
+        cursor: Comment cursor shared with other subreddits, or None to fetch every post
+        truncated_listings: Oldest post time reached per subreddit whose listing was cut off, filled in
+
+    Yields:
+        Document: Titles, selftexts and in-window comments
+    """
+    window_start, window_end = get_date_window(start_date, end_date)
+    lookback_start = get_lookback_start(window_start)
+    subreddit = await reddit.subreddit(subreddit_name)
+    max_pending = 2 * max(1, getattr(cfg, 'COMMENT_FETCH_WORKERS', 1))
+    pending: List[asyncio.Task] = []
+
+    scanned = 0
+    oldest = window_end
+    try:
+        async for post in timed_aiter('reddit_listing', subreddit.new(limit=getattr(cfg, 'MAX_LISTING_POSTS', 1000))):
+            scanned += 1
+            if is_before_window(post, lookback_start):
+                break
+            if not (lookback_start <= post.created_utc < window_end):
+                continue
+            oldest = min(oldest, post.created_utc)
+
+            if post.created_utc >= window_start:
+                for document in post_documents(post, subreddit_name):
+                    yield document
+            if cursor is not None and not cursor.should_fetch(post, window_start):
+                continue
+            pending.append(asyncio.create_task(fetch_top_comments_async(post, window_start, window_end, semaphore,
+                                                                        rate_limiter, cursor)))
+            while len(pending) > max_pending:
+                for document in comment_documents(await pending.pop(0), subreddit_name):
+                    yield document
+        else:
+            report_incomplete_listing(subreddit_name, scanned, lookback_start)
+            if truncated_listings is not None:
+                truncated_listings[subreddit_name] = oldest
+
+        while pending:
+            for document in comment_documents(await pending.pop(0), subreddit_name):
+                yield document
+        print(f"Read r/{subreddit_name} ({scanned} posts scanned)")
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _analyze_subreddit(reddit: Any, matcher: Any, subreddit_name: str, start_date: date, end_date: date,
+                             semaphore: asyncio.Semaphore, rate_limiter: AsyncRateLimiter,
+                             recorder: Optional[FixtureRecorder] = None,
+                             cursor: Optional[CommentCursor] = None,
+                             deduplicator: Optional[DocumentDeduplicator] = None,
+                             truncated_listings: Optional[Dict[str, float]] = None) -> SubredditResult:
+    aggregator = TrendAggregator(start_date, end_date)
+    async for document in iter_subreddit_documents_async(reddit, subreddit_name, start_date, end_date,
+                                                         semaphore, rate_limiter, cursor, truncated_listings):
+        if recorder is not None:
+            recorder.write(document)
+        document = normalize_document(document)
+        if deduplicator is not None:
+            with span('deduplication'):
+                if deduplicator.is_duplicate(document):
+                    continue
+        with span('matching'):
+            hits = matcher.find(document.text)
+        aggregator.add(document, hits)
+    return aggregator.daily_trends, aggregator.document_counts['title'], aggregator.daily_weights
+
+
+async def _analyze_subreddits(matcher: Any, subreddit_names: List[str], start_date: date, end_date: date,
+                              reddit_settings: Optional[dict] = None,
+                              recorder: Optional[FixtureRecorder] = None,
+                              cursor: Optional[CommentCursor] = None,
+                              deduplicator: Optional[DocumentDeduplicator] = None,
+                              truncated_listings: Optional[Dict[str, float]] = None) -> Dict[str, SubredditResult]:
+    import asyncpraw
+
+    # One client, fetch bound and rate budget shared by every subreddit
+    semaphore = asyncio.Semaphore(max(1, getattr(cfg, 'COMMENT_FETCH_WORKERS', 1)))
+    rate_limiter = AsyncRateLimiter(getattr(cfg, 'REDDIT_REQUESTS_PER_MINUTE', 90),
+                                    getattr(cfg, 'REDDIT_REQUEST_BURST', 10))
+
+    async with asyncpraw.Reddit(**(reddit_settings or get_reddit_settings())) as reddit:
+        results = await asyncio.gather(*(
+            _analyze_subreddit(reddit, matcher, name, start_date, end_date, semaphore, rate_limiter, recorder, cursor,
+                               deduplicator, truncated_listings)
+            for name in subreddit_names
+        ))
+    return dict(zip(subreddit_names, results))
+
+
+def analyze_subreddits_async(matcher: Any, subreddit_names: List[str], start_date: date, end_date: date,
+                             reddit_settings: Optional[dict] = None,
+                             recorder: Optional[FixtureRecorder] = None,
+                             cursor: Optional[CommentCursor] = None,
+                             deduplicator: Optional[DocumentDeduplicator] = None,
+                             truncated_listings: Optional[Dict[str, float]] = None) -> Dict[str, SubredditResult]:
+    """
+    Count keyword mentions per day in several subreddits concurrently using asyncpraw.
+
+    Args:
+        matcher: Compiled keyword matcher
+        subreddit_names: Names of the subreddits to analyze
+        start_date: First day to count
+        end_date: Last day to count, inclusive
+        reddit_settings: Client settings, defaults to get_reddit_settings()
+        recorder: Fixture recorder capturing the documents seen, or None to not record
+        cursor: Comment cursor skipping posts without new comments, or None to fetch every post
+        deduplicator: Filter skipping texts repeated within a subreddit and day, or None to count every copy
+        truncated_listings: Oldest post time reached per subreddit whose listing was cut off, filled in
+
+    Returns:
+        Dict[str, SubredditResult]: Mention counts per day, posts analyzed and weighted metric sums per subreddit
+    """
+    return asyncio.run(_analyze_subreddits(matcher, subreddit_names, start_date, end_date, reddit_settings,
+                                           recorder, cursor, deduplicator, truncated_listings))
+
+
+def analyze_subreddit_async(matcher: Any, subreddit_name: str, start_date: date, end_date: date,
+                            reddit_settings: Optional[dict] = None) -> SubredditResult:
+    """
+    Count keyword mentions per day in a subreddit using the asyncpraw ingestion engine.
+
+    Produces the same counts as lambda_function.analyze_subreddit while
+    overlapping listing paging and comment fetching under a shared rate limiter.
+
+    Args:
+        matcher: Compiled keyword matcher
+        subreddit_name: Name of the subreddit to analyze
+        start_date: First day to count
+        end_date: Last day to count, inclusive
+        reddit_settings: Client settings, defaults to get_reddit_settings()
+
+    Returns:
+        SubredditResult: Mention counts per day, the number of posts analyzed and weighted metric sums per day
+    """
+    return analyze_subreddits_async(matcher, [subreddit_name], start_date, end_date,
+                                    reddit_settings)[subreddit_name]
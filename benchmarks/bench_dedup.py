@@ -0,0 +1,78 @@
+"""
+Benchmark duplicate filtering ahead of matching.
+
+Builds a synthetic corpus from the template keywords in which --duplicates
+of the documents repeat an earlier text verbatim and --near-duplicates
+repeat one with a word changed, then matches and aggregates it without a
+filter, with exact filtering and with SimHash near-duplicate filtering.
+Reports throughput, documents skipped and how far the mention totals drop.
+
+Usage:
+    python benchmarks/bench_dedup.py [--documents 50000] [--duplicates 0.2] [--near-duplicates 0.1] [--distance 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_matching import load_keywords, make_documents  # noqa: E402
+from bench_pipeline import make_corpus  # noqa: E402
+from dedup import DocumentDeduplicator  # noqa: E402
+from keyword_matcher import build_keyword_matcher  # noqa: E402
+from pipeline import TrendAggregator, match_documents, normalize_documents  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--documents', type=int, default=50000)
+    parser.add_argument('--duplicates', type=float, default=0.2, help='Share of verbatim repeats')
+    parser.add_argument('--near-duplicates', type=float, default=0.1, help='Share of repeats with one word changed')
+    parser.add_argument('--distance', type=int, default=3, help='NEAR_DUPLICATE_DISTANCE of the near-duplicate run')
+    parser.add_argument('--min-chars', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    keywords = load_keywords()
+    matcher = build_keyword_matcher(keywords, 'token')
+    texts = make_documents(keywords, args.documents, args.seed)
+    for n in range(1, len(texts)):
+        roll = rng.random()
+        if roll < args.duplicates:
+            texts[n] = texts[rng.randrange(n)]
+        elif roll < args.duplicates + args.near_duplicates:
+            words = texts[rng.randrange(n)].split()
+            words[rng.randrange(len(words))] = 'edited'
+            texts[n] = ' '.join(words)
+
+    day = (datetime.now(timezone.utc) - timedelta(days=1)).date()
+    day_start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+    corpus = make_corpus(texts, day_start, args.seed)
+    print(f"{len(corpus)} documents, {args.duplicates:.0%} verbatim and {args.near_duplicates:.0%} edited repeats")
+
+    baseline = None
+    for label, deduplicator in (('no filter', None),
+                                ('exact', DocumentDeduplicator(args.min_chars)),
+                                (f"near (distance {args.distance})", DocumentDeduplicator(args.min_chars, args.distance))):
+        start = time.perf_counter()
+        documents = normalize_documents(corpus)
+        if deduplicator is not None:
+            documents = deduplicator.filter(documents)
+        aggregator = TrendAggregator(day, day).consume(match_documents(documents, matcher))
+        elapsed = time.perf_counter() - start
+        mentions = sum(aggregator.daily_trends[day].values())
+        baseline = baseline or mentions
+        skipped = deduplicator.stats() if deduplicator else {'exact_duplicates': 0, 'near_duplicates': 0}
+        print(f"{label:<22} {elapsed * 1000:9.1f} ms  {len(corpus) / elapsed:10.0f} docs/s  "
+              f"skipped {skipped['exact_duplicates']:6d} exact {skipped['near_duplicates']:6d} near  "
+              f"mentions {mentions / baseline:6.1%}")
+
+
+if __name__ == '__main__':
+    main()
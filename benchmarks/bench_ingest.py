@@ -0,0 +1,79 @@
+"""
+Benchmark the sync (praw) and async (asyncpraw) ingestion paths against a local fake Reddit.
+
+Requires config.py (copy config_template.py) and the praw/asyncpraw packages;
+no Reddit credentials or network access are needed.
+
+Usage:
+    python benchmarks/bench_ingest.py [--posts 200] [--comments 20] [--days 1] [--latency 0.05] [--workers 8]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('REDDIT_CLIENT_ID', 'bench')
+os.environ.setdefault('REDDIT_CLIENT_SECRET', 'bench')
+os.environ.setdefault('REDDIT_USER_AGENT', 'script:RedditTrendTrackerBench:v1.0')
+
+import praw  # noqa: E402
+
+import lambda_function as lf  # noqa: E402
+from async_ingest import analyze_subreddit_async  # noqa: E402
+from bench_matching import load_keywords  # noqa: E402
+from fake_reddit_server import FakeRedditCorpus, FakeRedditServer  # noqa: E402
+from keyword_matcher import build_keyword_matcher  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--comments', type=int, default=20)
+    parser.add_argument('--days', type=int, default=1, help='Days analyzed, as in a backfill')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds per fake request')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    end_date = (datetime.utcnow() - timedelta(days=1)).date()
+    start_date = end_date - timedelta(days=args.days - 1)
+    window_start, window_end = lf.get_date_window(start_date, end_date)
+    # Half the corpus falls inside the window, so early termination is exercised too
+    spacing = (window_end - window_start) * 2 // args.posts
+    corpus = FakeRedditCorpus(args.posts, args.comments, window_end, spacing)
+    matcher = build_keyword_matcher(load_keywords(), getattr(lf.cfg, 'MATCHER_BACKEND', 'aho_corasick'))
+
+    lf.cfg.REDDIT_REQUESTS_PER_MINUTE = 100000
+    lf.cfg.REDDIT_REQUEST_BURST = 1000
+
+    results = {}
+    with FakeRedditServer(corpus, args.latency) as server:
+        lf.cfg.REDDIT_API_OVERRIDES = {'oauth_url': server.url, 'reddit_url': server.url}
+        for label, workers in (('sync serial', 1), (f"sync x{args.workers}", args.workers),
+                               (f"async x{args.workers}", args.workers)):
+            lf.cfg.COMMENT_FETCH_WORKERS = workers
+            # The client pool is sized from COMMENT_FETCH_WORKERS when created
+            lf.RESOURCES.discard('Reddit client pool')
+            server.requests = 0
+            start = time.perf_counter()
+            if label.startswith('async'):
+                trends, post_count, _ = analyze_subreddit_async(matcher, 'bench', start_date, end_date)
+            else:
+                reddit = praw.Reddit(**lf.get_reddit_settings())
+                trends, post_count, _ = lf.analyze_subreddit(reddit, matcher, 'bench', start_date, end_date)
+            elapsed = time.perf_counter() - start
+            results[label] = (elapsed, server.requests, post_count, trends)
+
+    print(f"\n{args.posts} posts, {args.comments} comments/post, {args.days} days, {args.latency * 1000:.0f} ms latency")
+    reference = results['sync serial'][3]
+    for label, (elapsed, requests, post_count, trends) in results.items():
+        match = 'same counts' if trends == reference else 'COUNTS DIFFER'
+        print(f"{label:<12} {elapsed:7.2f} s  {requests:5d} requests  {post_count:5d} posts  {match}")
+
+
+if __name__ == '__main__':
+    main()
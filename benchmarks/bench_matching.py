@@ -0,0 +1,108 @@
+"""
+Compare keyword matching backends on templates/technology_keywords.csv.
+
+Usage:
+    python benchmarks/bench_matching.py [--documents 5000] [--extra-keywords 0] [--seed 7]
+
+--extra-keywords pads the CSV list with synthetic terms to show how each
+backend scales once the keyword list grows into the thousands.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Callable, List, Set
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from keyword_matcher import build_keyword_matcher  # noqa: E402
+
+KEYWORDS_CSV = os.path.join(ROOT, 'templates', 'technology_keywords.csv')
+
+FILLER_WORDS = [
+    'the', 'pipeline', 'said', 'email', 'maintain', 'nosql', 'mysql', 'team',
+    'we', 'migrated', 'our', 'warehouse', 'to', 'and', 'it', 'was', 'painful',
+    'streaming', 'batch', 'job', 'failed', 'again', 'anyone', 'tried', 'cost',
+]
+
+# Texts the token backend must not over- or under-count, with the hits expected from TOKEN_CASE_KEYWORDS
+TOKEN_CASE_KEYWORDS = {'r', '.net', 'node.js', 'pub/sub', 'ai', 'python', 'café'}
+TOKEN_CASES = [
+    ("cross-posted from r/dataengineering", set()),
+    ("our r&d budget doubled", set()),
+    ("net income was flat this quarter", set()),
+    ("we ported it to .net and node.js", {'.net', 'node.js'}),
+    ("asp.net is not the same thing", set()),
+    ("ai-powered python's pub/sub client", {'ai', 'python', 'pub/sub'}),
+    ("stats in r and a café with wifi", {'r', 'café'}),
+]
+
+
+def load_keywords() -> Set[str]:
+    with open(KEYWORDS_CSV, encoding='utf-8') as f:
+        return {line.strip().lower() for line in f if line.strip()}
+
+
+def add_synthetic_keywords(keywords: Set[str], count: int, seed: int) -> Set[str]:
+    rng = random.Random(seed)
+    stems = sorted(keywords)
+    extra = {f"{rng.choice(stems).split()[0]}{n}" if n % 3 else f"{rng.choice(stems)} tool{n}"
+             for n in range(count)}
+    return keywords | extra
+
+
+def make_documents(keywords: Set[str], count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    vocabulary = FILLER_WORDS * 4 + sorted(keywords)
+    return [
+        ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(5, 120))) + '.'
+        for _ in range(count)
+    ]
+
+
+def run(name: str, find: Callable[[str], Set[str]], documents: List[str]) -> Counter:
+    trends: Counter = Counter()
+    start = time.perf_counter()
+    for text in documents:
+        trends.update(find(text))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<14} {elapsed * 1000:9.1f} ms  {len(documents) / elapsed:10.0f} docs/s  "
+          f"{sum(trends.values()):7d} hits")
+    return trends
+
+
+def check_token_cases() -> None:
+    matcher = build_keyword_matcher(TOKEN_CASE_KEYWORDS, 'token')
+    failures = [(text, matcher.find(text), expected) for text, expected in TOKEN_CASES
+                if matcher.find(text) != expected]
+    print(f"Token cases: {len(TOKEN_CASES) - len(failures)}/{len(TOKEN_CASES)} as expected")
+    for text, found, expected in failures:
+        print(f"  {text!r}: found {sorted(found)}, expected {sorted(expected)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', type=int, default=5000)
+    parser.add_argument('--extra-keywords', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    keywords = add_synthetic_keywords(load_keywords(), args.extra_keywords, args.seed)
+    documents = make_documents(keywords, args.documents, args.seed)
+    print(f"{len(keywords)} keywords, {len(documents)} documents")
+
+    substring = run('substring', lambda text: {k for k in keywords if k in text}, documents)
+    run('aho_corasick', build_keyword_matcher(keywords, 'aho_corasick').find, documents)
+    token = run('token', build_keyword_matcher(keywords, 'token').find, documents)
+
+    inflated = sorted(((substring[k] - token[k], k) for k in substring if substring[k] > token[k]),
+                      reverse=True)[:5]
+    print("Largest substring over-counts: " + ', '.join(f"{k} (+{n})" for n, k in inflated))
+    check_token_cases()
+
+
+if __name__ == '__main__':
+    main()
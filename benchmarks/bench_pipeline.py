@@ -0,0 +1,96 @@
+"""
+Benchmark each stage of the streaming pipeline in isolation, then end to end.
+
+Stages are fed a synthetic document corpus built from the template keywords,
+so no network or config.py is needed.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--documents 50000] [--backend token] [--processes 2]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_matching import load_keywords, make_documents  # noqa: E402
+from keyword_matcher import build_keyword_matcher  # noqa: E402
+from match_pool import MatchWorkerPool, aggregate_documents  # noqa: E402
+from pipeline import Document, TrendAggregator, match_documents, normalize_documents, prefetch  # noqa: E402
+
+KINDS = ('title', 'selftext', 'comment', 'comment', 'comment')
+
+
+def make_corpus(texts: List[str], day_start: float, seed: int) -> List[Document]:
+    rng = random.Random(seed)
+    return [Document(rng.choice(KINDS), f"d{n}", 'bench', day_start + rng.random() * 86399, text.title())
+            for n, text in enumerate(texts)]
+
+
+def stream(corpus: List[Document]) -> Iterator[Document]:
+    # Rebuild each document so the end-to-end run doesn't hold the corpus twice
+    for document in corpus:
+        yield document._replace()
+
+
+def timed(label: str, count: int, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed * 1000:9.1f} ms  {count / elapsed:10.0f} docs/s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', type=int, default=50000)
+    parser.add_argument('--backend', default='token', choices=('aho_corasick', 'token'))
+    parser.add_argument('--queue-size', type=int, default=1000)
+    parser.add_argument('--processes', type=int, default=1, help='Match worker processes for a parallel run')
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    keywords = load_keywords()
+    matcher = build_keyword_matcher(keywords, args.backend)
+    day = (datetime.now(timezone.utc) - timedelta(days=1)).date()
+    day_start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+    corpus = make_corpus(make_documents(keywords, args.documents, args.seed), day_start, args.seed)
+    print(f"{len(corpus)} documents, {len(keywords)} keywords, {args.backend} matcher")
+
+    normalized = timed('normalize', len(corpus), lambda: list(normalize_documents(corpus)))
+    matches = timed('match', len(corpus), lambda: list(match_documents(normalized, matcher)))
+    timed('aggregate', len(corpus), lambda: TrendAggregator(day, day).consume(matches))
+
+    def run_pipeline() -> TrendAggregator:
+        return TrendAggregator(day, day).consume(
+            match_documents(normalize_documents(prefetch(stream(corpus), args.queue_size)), matcher))
+
+    aggregator = timed('end to end (prefetch)', len(corpus), run_pipeline)
+
+    if args.processes > 1:
+        with MatchWorkerPool(matcher, args.processes) as pool:
+            parallel = timed(f"end to end ({args.processes} procs)", len(corpus), lambda: aggregate_documents(
+                normalize_documents(prefetch(stream(corpus), args.queue_size)), matcher, day, day, pool,
+                min_documents=0, batch_size=args.batch_size))
+        match = 'same counts' if parallel.daily_trends == aggregator.daily_trends else 'COUNTS DIFFER'
+        print(f"Parallel matching: {match}")
+
+    # Separate run: tracemalloc slows allocation-heavy code too much to time under it
+    tracemalloc.start()
+    run_pipeline()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Peak pipeline memory: {peak / 1024:.0f} KB, "
+          f"{sum(aggregator.daily_trends[day].values())} keyword hits")
+
+
+if __name__ == '__main__':
+    main()
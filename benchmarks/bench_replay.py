@@ -0,0 +1,112 @@
+"""
+Benchmark analysis offline by replaying a recorded Reddit fixture.
+
+Record a fixture from a live run by setting RECORD_FIXTURE_PATH in config.py,
+or omit --fixture to generate a synthetic one from the template keywords.
+Reports matching throughput, end-to-end analysis time and peak memory; no
+network access is needed, so it can run in CI.
+
+Requires config.py (copy config_template.py).
+
+Usage:
+    python benchmarks/bench_replay.py [--fixture /tmp/reddit_fixture.jsonl.gz] [--documents 50000] [--json]
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import lambda_function as lf  # noqa: E402
+from bench_matching import load_keywords, make_documents  # noqa: E402
+from bench_pipeline import make_corpus  # noqa: E402
+from keyword_matcher import build_keyword_matcher  # noqa: E402
+from reddit_fixtures import iter_fixture_documents, write_fixture  # noqa: E402
+
+
+def synthetic_fixture(path: str, documents: int, subreddits: int, seed: int) -> None:
+    day = (datetime.now(timezone.utc) - timedelta(days=1)).date()
+    day_start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+    corpus = make_corpus(make_documents(load_keywords(), documents, seed), day_start, seed)
+    write_fixture(path, (document._replace(subreddit=f"bench_{n % subreddits}")
+                         for n, document in enumerate(corpus)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fixture', help='Recorded fixture, synthetic if omitted')
+    parser.add_argument('--documents', type=int, default=50000, help='Size of the synthetic fixture')
+    parser.add_argument('--subreddits', type=int, default=2, help='Subreddits in the synthetic fixture')
+    parser.add_argument('--backend', default='token', choices=('aho_corasick', 'token'))
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', action='store_true', help='Print results as one JSON object')
+    args = parser.parse_args()
+
+    fixture = args.fixture
+    if fixture is None:
+        fixture = os.path.join(tempfile.gettempdir(), 'bench_reddit_fixture.jsonl.gz')
+        synthetic_fixture(fixture, args.documents, args.subreddits, args.seed)
+
+    documents = list(iter_fixture_documents(fixture))
+    subreddits = sorted({document.subreddit for document in documents})
+    days = [datetime.fromtimestamp(document.created_utc, timezone.utc).date() for document in documents]
+    start_date, end_date = min(days), max(days)
+    matcher = build_keyword_matcher(load_keywords(), args.backend)
+
+    texts = [document.text.lower() for document in documents]
+    start = time.perf_counter()
+    for text in texts:
+        matcher.find(text)
+    match_seconds = time.perf_counter() - start
+    del texts
+
+    lf.cfg.INGEST_MODE = 'replay'
+    lf.cfg.REPLAY_FIXTURE_PATH = fixture
+
+    def analyze() -> dict:
+        return {name: lf.analyze_subreddit(None, matcher, name, start_date, end_date) for name in subreddits}
+
+    # Keep stdout machine-readable in --json mode
+    with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+        start = time.perf_counter()
+        results = analyze()
+        end_to_end_seconds = time.perf_counter() - start
+
+        # Separate run: tracemalloc slows allocation-heavy code too much to time under it
+        tracemalloc.start()
+        analyze()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    report = {
+        'fixture': fixture,
+        'documents': len(documents),
+        'subreddits': len(subreddits),
+        'days': (end_date - start_date).days + 1,
+        'match_docs_per_second': round(len(documents) / match_seconds),
+        'end_to_end_seconds': round(end_to_end_seconds, 3),
+        'end_to_end_docs_per_second': round(len(documents) / end_to_end_seconds),
+        'peak_memory_kb': round(peak / 1024),
+        'keyword_hits': sum(sum(counter.values()) for trends, _, _ in results.values() for counter in trends.values()),
+    }
+    if args.json:
+        print(json.dumps(report))
+        return
+    print(f"\n{report['documents']} documents, {report['subreddits']} subreddits, {report['days']} days "
+          f"from {fixture}")
+    print(f"{'match':<12} {report['match_docs_per_second']:10d} docs/s")
+    print(f"{'end to end':<12} {report['end_to_end_docs_per_second']:10d} docs/s  "
+          f"{report['end_to_end_seconds']:.2f} s")
+    print(f"{'peak memory':<12} {report['peak_memory_kb']:10d} KB  ({report['keyword_hits']} keyword hits)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark the compact snapshot files: size on disk and aggregation over months of days.
+
+Writes --days synthetic daily snapshots (--subreddits x --keywords counts,
+about --density of keywords mentioned per subreddit and day) to a temporary
+directory laid out like the S3 prefix, then times aggregate_snapshots over
+the whole range, for all subreddits and for one.
+
+Usage:
+    python benchmarks/bench_snapshots.py [--days 90] [--subreddits 10] [--keywords 1000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from snapshot_store import aggregate_snapshots, snapshot_key, write_snapshot  # noqa: E402
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--subreddits', type=int, default=10)
+    parser.add_argument('--keywords', type=int, default=1000)
+    parser.add_argument('--density', type=float, default=0.6, help='Share of keywords mentioned per subreddit and day')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    keywords = [f"keyword_{n}" for n in range(args.keywords)]
+    mentioned = max(1, int(args.keywords * args.density))
+    start_date = date(2024, 1, 1)
+    end_date = start_date + timedelta(days=args.days - 1)
+    root = tempfile.mkdtemp(prefix='bench_snapshots_')
+    try:
+        total_bytes = 0
+        for n in range(args.days):
+            path = snapshot_key(root, start_date + timedelta(days=n))
+            write_snapshot(path, {f"subreddit_{s}": {keyword: rng.randint(1, 200)
+                                                    for keyword in rng.sample(keywords, mentioned)}
+                                  for s in range(args.subreddits)})
+            total_bytes += os.path.getsize(path)
+        entries = args.days * args.subreddits * mentioned
+
+        print(f"{args.days} days, {entries} counts, {total_bytes / 1024:.0f} KB on disk "
+              f"({total_bytes / entries:.1f} bytes per count)")
+        for label, subreddits in (('all subreddits', None), ('one subreddit', ['subreddit_0'])):
+            seconds = best_of(args.repeat, lambda: aggregate_snapshots(root, start_date, end_date, subreddits))
+            print(f"{'aggregate ' + label:<28} {seconds * 1000:8.1f} ms")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
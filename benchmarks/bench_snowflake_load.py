@@ -0,0 +1,80 @@
+"""
+Compare the executemany INSERT path with the staged COPY INTO path of save_to_snowflake.
+
+Runs against a local stand-in instead of a warehouse: the client-side work
+is real (the connector's own parameter escaping, which rewrites executemany
+into a single multi-row INSERT, versus writing the gzip CSV), and the wire
+time is estimated from the payload size with --latency and --mbps.
+
+Requires config.py (copy config_template.py) and snowflake-connector-python.
+
+Usage:
+    python benchmarks/bench_snowflake_load.py [--rows 1000 10000 100000] [--latency 0.05] [--mbps 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from typing import Any, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from snowflake.connector.converter import SnowflakeConverter  # noqa: E402
+
+import lambda_function as lf  # noqa: E402
+
+INSERT_PREFIX = f"INSERT INTO REDDIT_TRENDS ({', '.join(lf.TREND_COLUMNS)}) VALUES "
+
+
+def make_trends(rows: int) -> dict:
+    subreddits = max(1, rows // 1000)
+    return {f"subreddit_{s}": {f"keyword_{k}": (k * 7919) % 500 + 1 for k in range(rows // subreddits)}
+            for s in range(subreddits)}
+
+
+def render_insert(records: List[Tuple[Any, ...]]) -> str:
+    # Same per-value conversion the connector applies for pyformat executemany
+    converter = SnowflakeConverter()
+    values = ['(' + ','.join(converter.quote(converter.escape(converter.to_snowflake(v))) for v in row) + ')'
+              for row in records]
+    return INSERT_PREFIX + ','.join(values)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds per statement round trip')
+    parser.add_argument('--mbps', type=float, default=50.0, help='Upload bandwidth in megabits per second')
+    args = parser.parse_args()
+
+    def wire_seconds(payload_bytes: int, statements: int) -> float:
+        return statements * args.latency + payload_bytes * 8 / (args.mbps * 1_000_000)
+
+    print(f"{'rows':>8} {'path':<12} {'client':>10} {'payload':>10} {'est. total':>11}")
+    for rows in args.rows:
+        records = lf.build_trend_records({date.today(): make_trends(rows)}, datetime.utcnow())
+
+        start = time.perf_counter()
+        statement = render_insert(records)
+        insert_client = time.perf_counter() - start
+        insert_bytes = len(statement.encode('utf-8'))
+
+        path = os.path.join(tempfile.gettempdir(), 'bench_reddit_trends.csv.gz')
+        start = time.perf_counter()
+        lf.write_records_csv(records, path)
+        copy_client = time.perf_counter() - start
+        copy_bytes = os.path.getsize(path)
+        os.remove(path)
+
+        # executemany: one statement; bulk: PUT then COPY INTO
+        for label, client, payload, statements in (('executemany', insert_client, insert_bytes, 1),
+                                                   ('copy into', copy_client, copy_bytes, 2)):
+            total = client + wire_seconds(payload, statements)
+            print(f"{len(records):>8} {label:<12} {client * 1000:8.1f}ms {payload / 1024:8.0f}KB {total:10.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Measure the cold-start import cost of lambda_function and its dependencies.
+
+Each measurement runs in a fresh interpreter with python -X importtime, so
+nothing is shared between runs. Reports the import time of lambda_function
+as deployed (praw, boto3 and the Snowflake connector are imported on first
+use), the cost of each of those dependencies on its own, and the heaviest
+modules imported by lambda_function itself. A cold invocation pays the
+module import plus the dependencies its code path touches; a warm one pays
+neither.
+
+No config.py is needed: it is read on first use too.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--top 10] [--json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEPENDENCIES = ('praw', 'boto3', 'snowflake.connector')
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_times(module: str) -> List[Tuple[str, int, int]]:
+    # (module, depth, cumulative microseconds) for the module and everything its import pulls in
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            cwd=ROOT, env={**os.environ, 'PYTHONPATH': ROOT, 'PYTHONDONTWRITEBYTECODE': '1'},
+                            capture_output=True, text=True, check=True)
+    times = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            times.append((match.group(4), len(match.group(3)) // 2, int(match.group(2))))
+    # Children are listed before their parent; interpreter startup imports come first
+    end = max(n for n, (name, depth, _) in enumerate(times) if depth == 0 and name == module)
+    start = end
+    while start > 0 and times[start - 1][1] > 0:
+        start -= 1
+    return times[start:end + 1]
+
+
+def median_ms(module: str, repeat: int) -> float:
+    return statistics.median(import_times(module)[-1][2] for _ in range(repeat)) / 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters per measurement')
+    parser.add_argument('--top', type=int, default=10, help='Heaviest direct imports of lambda_function shown')
+    parser.add_argument('--json', action='store_true', help='Print results as one JSON object')
+    args = parser.parse_args()
+
+    report: Dict[str, object] = {
+        'lambda_function_ms': round(median_ms('lambda_function', args.repeat), 1),
+        'dependencies_ms': {name: round(median_ms(name, args.repeat), 1) for name in DEPENDENCIES},
+    }
+    times = import_times('lambda_function')
+    loaded = {name for name, _, _ in times}
+    report['dependencies_loaded_at_import'] = [name for name in DEPENDENCIES if name in loaded]
+    direct = sorted(((name, cumulative) for name, depth, cumulative in times if depth == 1),
+                    key=lambda item: -item[1])
+    report['heaviest_imports_ms'] = {name: round(cumulative / 1000, 1) for name, cumulative in direct[:args.top]}
+
+    if args.json:
+        print(json.dumps(report))
+        return
+    print(f"{'import lambda_function':<28} {report['lambda_function_ms']:8.1f} ms  (median of {args.repeat})")
+    for name, ms in report['dependencies_ms'].items():
+        print(f"{'import ' + name:<28} {ms:8.1f} ms")
+    print(f"\nDependencies loaded by import lambda_function: "
+          f"{', '.join(report['dependencies_loaded_at_import']) or 'none'}")
+    print("\nHeaviest imports of lambda_function:")
+    for name, ms in report['heaviest_imports_ms'].items():
+        print(f"  {name:<26} {ms:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
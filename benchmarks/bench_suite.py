@@ -0,0 +1,162 @@
+"""
+Benchmark suite with stored baselines and regression thresholds.
+
+Times the hot paths of a run over synthetic corpora at several scales:
+keyword CSV parsing (as in load_keywords_from_s3), matcher compilation, the
+normalize/match/aggregate loop of analyze_reddit_trends, and record
+construction in save_to_snowflake. Keyword lists of each size are generated
+from templates/technology_keywords.csv.
+
+Each case is looped enough times per sample (timeit's autorange, at least
+0.2 s) that sub-millisecond calls are measured well above the timer's
+resolution, and the median per-call time of --repeat samples is compared
+with the median stored in benchmarks/baselines.json. The script exits
+non-zero if any case is slower than its baseline by more than --threshold.
+The spread of the samples is printed next to each median, so a threshold
+can be judged against the noise actually seen; repeat runs on one machine
+stay within about 15% of each other, well inside the 1.5x default.
+Baselines are machine specific, so record them on the machine that checks
+them; a warning is printed when the stored machine differs from this one.
+
+Requires config.py (copy config_template.py).
+
+Usage:
+    python benchmarks/bench_suite.py [--documents 1000 10000 100000] [--keywords 100 1000 10000]
+    python benchmarks/bench_suite.py --update-baselines
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import statistics
+import timeit
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Set, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import lambda_function as lf  # noqa: E402
+from bench_matching import add_synthetic_keywords, load_keywords, make_documents  # noqa: E402
+from bench_pipeline import make_corpus  # noqa: E402
+from keyword_matcher import build_keyword_matcher  # noqa: E402
+from pipeline import TrendAggregator, match_documents, normalize_documents  # noqa: E402
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+
+def make_keywords(count: int, seed: int) -> List[str]:
+    # CSV keywords first, padded with synthetic terms derived from them
+    base = load_keywords()
+    extra = add_synthetic_keywords(base, 2 * count, seed) - base
+    return (sorted(base) + sorted(extra))[:count]
+
+
+def median_time(repeat: int, func: Callable[[], object]) -> Tuple[float, float]:
+    """Median seconds per call over repeat samples, and the samples' spread relative to it."""
+    # Keep the collector on, as it is in a real run; timeit disables it by default
+    timer = timeit.Timer(func, setup='gc.enable()')
+    number, first = timer.autorange()
+    samples = [t / number for t in [first] + timer.repeat(max(0, repeat - 1), number)]
+    median = statistics.median(samples)
+    return median, (max(samples) - min(samples)) / median
+
+
+def machine_description() -> str:
+    return f"{platform.python_implementation()} {platform.python_version()} {platform.machine()}, {os.cpu_count()} CPUs"
+
+
+def run_cases(document_scales: List[int], keyword_scales: List[int], backend: str,
+              repeat: int, seed: int) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+    day = (datetime.now(timezone.utc) - timedelta(days=1)).date()
+    day_start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+
+    def record(name: str, timing: Tuple[float, float], items: int) -> None:
+        seconds, spread = timing
+        results[name] = seconds
+        print(f"{name:<36} {seconds * 1000:10.3f} ms  ±{spread * 50:4.1f}%  {items / seconds:12.0f} items/s")
+
+    for keyword_count in keyword_scales:
+        keywords = make_keywords(keyword_count, seed)
+        csv_content = '\n'.join(keywords) + '\n'
+        record(f"parse_keywords_csv/k={keyword_count}",
+               median_time(repeat, lambda: lf.parse_keywords_csv(csv_content)), len(keywords))
+        keyword_set: Set[str] = set(keywords)
+        record(f"build_matcher/k={keyword_count}",
+               median_time(repeat, lambda: build_keyword_matcher(keyword_set, backend)), len(keywords))
+        matcher = build_keyword_matcher(keyword_set, backend)
+
+        aggregators: List[TrendAggregator] = []
+        for document_count in document_scales:
+            corpus = make_corpus(make_documents(keyword_set, document_count, seed), day_start, seed)
+
+            def analyze() -> None:
+                aggregators[:] = [TrendAggregator(day, day).consume(
+                    match_documents(normalize_documents(corpus), matcher))]
+
+            record(f"match/d={document_count}/k={keyword_count}", median_time(repeat, analyze), len(corpus))
+
+        # One row per keyword and subreddit, as saved for a day tracking 10 subreddits
+        trends = {day: {f"bench_{n}": dict(aggregators[0].daily_trends[day]) for n in range(10)}}
+        rows = sum(len(counts) for counts in trends[day].values())
+        snapshot_time = datetime.utcnow()
+        record(f"build_trend_records/k={keyword_count}",
+               median_time(repeat, lambda: lf.build_trend_records(trends, snapshot_time)), rows)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--documents', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--keywords', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--backend', default='token', choices=('aho_corasick', 'token'))
+    parser.add_argument('--repeat', type=int, default=5, help='Timed samples per case; the median is kept')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='Fail when a case takes longer than baseline x threshold')
+    parser.add_argument('--baselines', default=BASELINES)
+    parser.add_argument('--update-baselines', action='store_true', help='Store these results as the baselines')
+    args = parser.parse_args()
+
+    results = run_cases(args.documents, args.keywords, args.backend, args.repeat, args.seed)
+
+    if args.update_baselines:
+        with open(args.baselines, 'w', encoding='utf-8') as f:
+            json.dump({'machine': machine_description(),
+                       'backend': args.backend,
+                       'recorded': datetime.utcnow().strftime('%Y-%m-%d'),
+                       'seconds': {name: round(seconds, 9) for name, seconds in results.items()}}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nStored {len(results)} baselines in {args.baselines}")
+        return
+
+    if not os.path.exists(args.baselines):
+        print(f"\nNo baselines at {args.baselines}; run with --update-baselines to record them")
+        return
+    with open(args.baselines, encoding='utf-8') as f:
+        stored = json.load(f)
+    baselines = stored['seconds']
+    if stored.get('machine') != machine_description():
+        print(f"\nWarning: baselines were recorded on {stored.get('machine')}, not {machine_description()}; "
+              f"re-record them here with --update-baselines before comparing")
+
+    regressions = []
+    print(f"\n{'case':<36} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    for name, seconds in results.items():
+        if name not in baselines:
+            continue
+        ratio = seconds / baselines[name]
+        flag = '  REGRESSION' if ratio > args.threshold else ''
+        print(f"{name:<36} {baselines[name] * 1000:8.3f}ms {seconds * 1000:8.3f}ms {ratio:6.2f}x{flag}")
+        if flag:
+            regressions.append(name)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than {args.threshold}x baseline")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Minimal local stand-in for the Reddit OAuth API, used by the ingest benchmarks.
+
+Serves the endpoints praw and asyncpraw touch during analysis (token grant,
+/r/<subreddit>/new listings and /comments/<id> trees) from a deterministic
+synthetic corpus, with a fixed per-request latency to mimic network round
+trips. Point a client at it with:
+
+    REDDIT_API_OVERRIDES = {"oauth_url": server.url, "reddit_url": server.url}
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+WORDS = [
+    'the', 'pipeline', 'team', 'migrated', 'warehouse', 'streaming', 'batch',
+    'job', 'failed', 'cost', 'anyone', 'tried', 'python', 'sql', 'spark',
+    'airflow', 'dbt', 'snowflake', 'databricks', 'kafka', 'aws', 'azure',
+]
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+class FakeRedditCorpus:
+    """
+    Deterministic posts and comments served by FakeRedditServer.
+    """
+
+    def __init__(self, posts: int, comments_per_post: int, window_end: int,
+                 seconds_between_posts: int = 600, seed: int = 7):
+        rng = random.Random(seed)
+        self.posts: List[Dict[str, Any]] = []
+        self.comments: Dict[str, List[Dict[str, Any]]] = {}
+        for n in range(posts):
+            post_id = f"p{n:05d}"
+            created = window_end - 1 - n * seconds_between_posts
+            self.posts.append({
+                'id': post_id, 'name': f"t3_{post_id}", 'title': _text(rng, 12),
+                'selftext': _text(rng, 60) if n % 2 else '', 'created_utc': float(created),
+                'score': rng.randint(0, 500), 'num_comments': comments_per_post,
+                'subreddit': 'bench', 'author': 'bench_user', 'permalink': f"/r/bench/comments/{post_id}/",
+            })
+            self.comments[post_id] = [{
+                'id': f"{post_id}c{c}", 'name': f"t1_{post_id}c{c}", 'body': _text(rng, 30),
+                'score': rng.randint(-5, 200), 'created_utc': float(created + 30 * (c + 1)),
+                'depth': 0, 'replies': '', 'parent_id': f"t3_{post_id}", 'link_id': f"t3_{post_id}",
+                'author': 'bench_user', 'subreddit': 'bench',
+            } for c in range(comments_per_post)]
+
+
+def _listing(kind: str, children: List[Dict[str, Any]], after: Optional[str] = None) -> Dict[str, Any]:
+    return {'kind': 'Listing', 'data': {
+        'after': after, 'before': None, 'dist': len(children),
+        'children': [{'kind': kind, 'data': child} for child in children],
+    }}
+
+
+class FakeRedditServer:
+    """
+    Threaded HTTP server serving a FakeRedditCorpus on localhost.
+    """
+
+    def __init__(self, corpus: FakeRedditCorpus, latency: float = 0.05):
+        self.corpus = corpus
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> 'FakeRedditServer':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def _send(self, payload: Any) -> None:
+                with server._lock:
+                    server.requests += 1
+                time.sleep(server.latency)
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('x-ratelimit-remaining', '600')
+                self.send_header('x-ratelimit-used', '0')
+                self.send_header('x-ratelimit-reset', '600')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                self._send({'access_token': 'bench', 'token_type': 'bearer',
+                            'expires_in': 86400, 'scope': '*'})
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                posts = server.corpus.posts
+
+                if re.fullmatch(r'/r/[^/]+/new/?', url.path):
+                    start = 0
+                    if params.get('after'):
+                        start = next(i for i, p in enumerate(posts) if p['name'] == params['after']) + 1
+                    page = posts[start:start + int(params.get('limit', 25))]
+                    after = page[-1]['name'] if page and start + len(page) < len(posts) else None
+                    self._send(_listing('t3', page, after))
+                    return
+
+                match = re.fullmatch(r'/comments/([^/]+)/?', url.path)
+                if match:
+                    post = next(p for p in posts if p['id'] == match.group(1))
+                    self._send([_listing('t3', [post]),
+                                _listing('t1', server.corpus.comments[post['id']])])
+                    return
+
+                self.send_error(404)
+
+        return Handler
@@ -5,9 +5,75 @@ SECRET_NAME = "<your-secret-name>"
 # S3 Settings
 BUCKET_NAME = "<your-s3-bucket>"         
 KEYWORDS_KEY = "<your-s3-key-path>"     
+KEYWORDS_CACHE_DIR = "/tmp"               # Parsed keywords + compiled matcher cached by ETag (None disables)
+DEBUG_S3_LISTING = False                  # Log the bucket's data_eng/ objects on every run
 
 # Reddit Settings
 SUBREDDIT_NAME = "<your-subreddit-name>"  # e.g., dataengineering
-POST_LIMIT = 100                          # Number of posts to analyze
-INITIAL_COMMENT_FETCH = 50                # Number of comments to initially fetch per post
+SUBREDDIT_NAMES = [SUBREDDIT_NAME]        # All subreddits tracked in one invocation
+MAX_LISTING_POSTS = 1000                  # Safety cap on posts scanned; paging stops once posts predate the window
+INITIAL_COMMENT_FETCH = 50                # Comments requested per post, in COMMENT_SORT order
+COMMENT_SORT = "top"                      # Sort of the initial fetch, "top" keeps the highest-scoring comments; lookback posts use "new"
+REPLACE_MORE_LIMIT = 0                    # "Load more comments" stubs expanded per post (one API request each)
+REPLACE_MORE_THRESHOLD = 0                # Skip stubs hiding fewer comments than this
+MAX_COMMENT_DEPTH = None                  # Deepest reply level considered, 0 = top-level comments only (None = all)
 TOP_COMMENTS_LIMIT = 10                   # Number of top comments to analyze per post
+COMMENT_LOOKBACK_DAYS = 3                 # Older posts revisited for comments written on the analyzed day
+COMMENT_CURSOR_KEY = "reddit_trends/comment_cursor.json"  # S3 key of per-post comment high-water marks (None disables)
+
+# Matching Settings
+MATCHER_BACKEND = "token"                 # "token" (whole words) or "aho_corasick" (substring, legacy)
+
+# Deduplication Settings
+DEDUP_DOCUMENTS = True                    # Count each repeated text (crossposts, bots, copy-pastes) once per subreddit and day
+DEDUP_MIN_CHARS = 32                      # Shorter texts, e.g. "thanks!", are always counted
+NEAR_DUPLICATE_DISTANCE = 0               # Most differing SimHash bits (of 64) for a near-duplicate, e.g. 3; 0 skips exact repeats only
+
+# Concurrency Settings
+SUBREDDIT_WORKERS = 4                     # Subreddits ingested in parallel
+COMMENT_FETCH_WORKERS = 8                 # Parallel comment fetches across all subreddits (1 = serial)
+REDDIT_REQUESTS_PER_MINUTE = 90           # Budget shared by every Reddit request (OAuth allows 100/min)
+REDDIT_REQUEST_BURST = 10                 # Requests that may be issued back to back
+PIPELINE_QUEUE_SIZE = 1000                # Documents buffered between fetching and matching
+MATCH_PROCESSES = 1                       # Keyword matching processes (1 = in-process; Lambda has 2 vCPUs at 3 GB)
+PARALLEL_MATCH_MIN_DOCUMENTS = 20000      # Subreddits yielding fewer documents are matched in-process
+MATCH_BATCH_SIZE = 2000                   # Documents sent to a match process at a time
+
+# Ingestion Settings
+INGEST_MODE = "sync"                      # "sync" (praw), "async" (asyncpraw) or "replay" (recorded fixture)
+RECORD_FIXTURE_PATH = None                # e.g. "/tmp/reddit_fixture.jsonl.gz" to record the documents a live run sees
+REPLAY_FIXTURE_PATH = None                # Fixture read when INGEST_MODE is "replay"
+REDDIT_API_OVERRIDES = {}                 # Extra praw/asyncpraw settings, e.g. {"oauth_url": "http://127.0.0.1:8080"}
+
+# Streaming Settings
+DAILY_SNAPSHOT_SOURCE = "crawl"           # "crawl" (analyze the day's listings) or "hourly" (roll up REDDIT_TRENDS_HOURLY)
+STREAM_RUN_SECONDS = 240                  # Time a {"stream": true} invocation spends consuming the streams
+STREAM_FLUSH_SECONDS = 60                 # Interval between additions to REDDIT_TRENDS_HOURLY
+STREAM_FLUSH_RESERVE_SECONDS = 30         # Lambda time kept back for the final flush
+STREAM_POLL_SECONDS = 5                   # Pause when neither stream has new items
+STREAM_CURSOR_KEY = None                  # S3 cursor kept by earlier versions, read while REDDIT_STREAM_CURSOR is empty
+
+# Caching Settings
+SECRETS_TTL_SECONDS = 900                 # How long fetched secrets are reused
+SECRETS_CACHE_PATH = None                 # e.g. "/tmp/reddit_tracker_secrets.json" to survive new execution environments
+
+# Snowflake Settings
+BULK_LOAD_THRESHOLD = 5000                # Rows at which saves switch from INSERT to staged COPY INTO
+BULK_LOAD_STAGE = "@~/reddit_trends"      # Internal stage for bulk files (user stage needs no grants)
+
+# Snapshot Files Settings
+SNAPSHOT_PREFIX = None                    # e.g. "reddit_trends/snapshots" to also write daily snapshot files to S3 (crawl mode)
+
+# Trend Detection Settings
+TREND_STATE_KEY = None                    # e.g. "reddit_trends/trend_state.json" to keep rolling averages in S3 and rank spikes (crawl mode)
+TREND_EWMA_ALPHA = 0.1                    # Weight of the newest day in the rolling mean and variance (2 / (span + 1))
+TREND_Z_THRESHOLD = 3.0                   # Standard deviations above the rolling mean that make a spike
+TREND_MIN_MENTIONS = 5                    # Fewest mentions in a day for a spike
+TREND_WARMUP_DAYS = 7                     # Days of history per subreddit before spikes are reported
+TREND_TOP_N = 20                          # Spiking keywords returned per run
+
+# Monitoring Settings
+METRICS_NAMESPACE = "RedditTrendTracker"  # CloudWatch namespace for the per-invocation stage timings
+
+# Backfill Settings
+MAX_BACKFILL_DAYS = 31                    # Longest date range accepted in a backfill event
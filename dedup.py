@@ -0,0 +1,172 @@
+import threading
+from collections import Counter
+from datetime import date
+from hashlib import blake2b
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from pipeline import Document, utc_day
+from timing import span
+
+FINGERPRINT_BITS = 64
+SHINGLE_WORDS = 2
+_HEX_DIGIT_VALUES = bytes.maketrans(b'0123456789abcdef', bytes(range(16)))
+
+
+def content_digest(text: str) -> bytes:
+    """
+    Hash a document's text, ignoring differences in whitespace.
+
+    Args:
+        text: Normalized document text
+
+    Returns:
+        bytes: 8-byte BLAKE2b digest
+    """
+    return blake2b(' '.join(text.split()).encode('utf-8'), digest_size=8).digest()
+
+
+def simhash(text: str) -> int:
+    """
+    Compute the SimHash fingerprint of a text from its word shingles.
+
+    Texts that share most of their shingles get fingerprints that differ in
+    only a few bits. Shingles are hashed with hash(), which is salted per
+    process, so fingerprints are only comparable within one process.
+
+    Args:
+        text: Normalized document text
+
+    Returns:
+        int: 64-bit fingerprint
+    """
+    words = text.split()
+    if len(words) < SHINGLE_WORDS:
+        shingles = [tuple(words)]
+    else:
+        shingles = list(zip(*(words[n:] for n in range(SHINGLE_WORDS))))
+    mask = (1 << FINGERPRINT_BITS) - 1
+    bit_counts = [0] * FINGERPRINT_BITS
+    for start in range(0, len(shingles), 15):
+        # Read as hex, each hash bit becomes a 4-bit lane, so 15 hashes add up without carries
+        lanes = sum(int(format(hash(shingle) & mask, '064b'), 16) for shingle in shingles[start:start + 15])
+        lane_counts = format(lanes, '064x').encode('ascii').translate(_HEX_DIGIT_VALUES)
+        bit_counts = [total + count for total, count in zip(bit_counts, lane_counts)]
+    # A bit is set when it is set in the hashes of most shingles
+    fingerprint = 0
+    for count in bit_counts:
+        fingerprint = fingerprint << 1 | (2 * count > len(shingles))
+    return fingerprint
+
+
+class DocumentDeduplicator:
+    """
+    Filter that lets the first copy of a text through and skips the repeats.
+
+    Crossposts, bot comments and copy-pasted answers would otherwise be matched
+    and counted once per copy. Exact repeats are found with a set of content
+    digests; with max_distance above 0, documents whose SimHash fingerprint
+    differs from an earlier one in at most max_distance bits are skipped too.
+    Fingerprints are indexed by max_distance + 1 bands, at least one of which
+    a near-duplicate matches exactly, so a lookup only compares the few
+    fingerprints sharing a band. Texts shorter than min_chars, e.g. "thanks!",
+    are always counted.
+
+    Counts are kept per subreddit and UTC day, so texts are only compared
+    within the same (subreddit, day): a crosspost is counted once in each
+    subreddit, and a text repeated on a later day is counted on that day too.
+    One deduplicator can be shared by the threads analyzing different
+    subreddits and days; within a scope the copy counted is the first one seen.
+    """
+
+    def __init__(self, min_chars: int = 32, max_distance: int = 0):
+        """
+        Args:
+            min_chars: Shortest text checked for duplicates
+            max_distance: Most differing fingerprint bits for a near-duplicate, 0 to only skip exact repeats
+
+        Raises:
+            ValueError: If max_distance leaves bands narrower than 4 bits
+        """
+        if max_distance < 0 or (max_distance and FINGERPRINT_BITS // (max_distance + 1) < 4):
+            raise ValueError(f"max_distance must be between 0 and {FINGERPRINT_BITS // 4 - 1}, got {max_distance}")
+        self.min_chars = min_chars
+        self.max_distance = max_distance
+        self._digests: Dict[Tuple[str, date], Set[bytes]] = {}
+        self._bands: Dict[Tuple[str, date], List[Dict[int, List[int]]]] = {}
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.skipped: Counter = Counter()
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        bands = self.max_distance + 1
+        width = FINGERPRINT_BITS // bands
+        return [fingerprint >> (n * width) & ((1 << width) - 1) for n in range(bands)]
+
+    def _near_duplicate(self, bands: List[Dict[int, List[int]]], fingerprint: int) -> bool:
+        keys = self._band_keys(fingerprint)
+        for band, key in zip(bands, keys):
+            for other in band.get(key, ()):
+                if bin(fingerprint ^ other).count('1') <= self.max_distance:
+                    return True
+        for band, key in zip(bands, keys):
+            band.setdefault(key, []).append(fingerprint)
+        return False
+
+    def is_duplicate(self, document: Document) -> bool:
+        """
+        Check a document against the texts seen so far in its subreddit and day, and remember it.
+
+        Args:
+            document: Normalized document
+
+        Returns:
+            bool: True if the document repeats an earlier text and should be skipped
+        """
+        if len(document.text) < self.min_chars:
+            return False
+        scope = (document.subreddit, utc_day(document.created_utc))
+        digest = content_digest(document.text)
+        fingerprint = None
+        # Hash outside the lock; the unlocked peek only spares fingerprinting a known exact repeat,
+        # since digests are never removed and the check is repeated under the lock
+        if self.max_distance and digest not in self._digests.get(scope, ()):
+            fingerprint = simhash(document.text)
+        with self._lock:
+            self.checked += 1
+            digests = self._digests.setdefault(scope, set())
+            if digest in digests:
+                self.skipped['exact'] += 1
+                return True
+            digests.add(digest)
+            if fingerprint is not None:
+                bands = self._bands.setdefault(scope, [{} for _ in range(self.max_distance + 1)])
+                if self._near_duplicate(bands, fingerprint):
+                    self.skipped['near'] += 1
+                    return True
+        return False
+
+    def filter(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """
+        Deduplication stage. Time spent checking is recorded under the 'deduplication' span.
+
+        Args:
+            documents: Normalized documents
+
+        Yields:
+            Document: Documents whose text was not seen before
+        """
+        for document in documents:
+            with span('deduplication'):
+                duplicate = self.is_duplicate(document)
+            if not duplicate:
+                yield document
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Summarize the documents checked and skipped so far.
+
+        Returns:
+            Dict[str, int]: Documents checked, and exact and near duplicates skipped
+        """
+        return {'documents_checked': self.checked, 'exact_duplicates': self.skipped['exact'],
+                'near_duplicates': self.skipped['near']}
@@ -0,0 +1,172 @@
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Tokens are runs of letters (of any script), digits, _, + and #, joined across inner "." and "&" so "node.js",
+# "asp.net" and "r&d" stay whole; "-", "/" and "'" split them, so "ai-powered", "aws/azure" and "python's" yield
+# "ai", "aws", "azure" and "python". A leading "." is kept (".net", not "net"), and subreddit and user references
+# such as "r/dataengineering" are single tokens, so the keyword "r" does not match them
+TOKEN_PATTERN = re.compile(r"[ru]/\w+|[\w+#]+(?:[.&][\w+#]+)*|\.(?<![\w.]\.)[\w+#]+(?:[.&][\w+#]+)*")
+
+MATCHER_BACKENDS = ('aho_corasick', 'token')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split lowercased text into whole-word tokens.
+
+    Args:
+        text: Lowercased text
+
+    Returns:
+        List[str]: Tokens in document order
+    """
+    return TOKEN_PATTERN.findall(text)
+
+
+class AhoCorasickMatcher:
+    """
+    Multi-keyword substring matcher backed by an Aho-Corasick automaton.
+
+    The automaton is compiled once from the keyword set, after which every
+    document is scanned in a single pass regardless of how many keywords are
+    tracked. Matching semantics are identical to `keyword in text`.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        """
+        Compile the automaton for the given keywords.
+
+        Args:
+            keywords: Lowercased keywords to match
+        """
+        self.keywords: Set[str] = {keyword for keyword in keywords if keyword}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[str, ...]] = [()]
+
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] += (keyword,)
+
+        # Breadth-first pass to wire failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> Set[str]:
+        """
+        Find every keyword occurring in the text.
+
+        Args:
+            text: Lowercased document text
+
+        Returns:
+            Set[str]: Keywords found at least once in the text
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        hits: Set[str] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                hits.update(output[state])
+        return hits
+
+
+class TokenIndexMatcher:
+    """
+    Whole-token keyword matcher backed by an n-gram lookup table.
+
+    Keywords are tokenized at build time and keyed by their joined token
+    n-gram, so a document is tokenized once and each n-gram window is a single
+    hash lookup. Unlike substring matching, "ai" does not match "email" and
+    "sql" does not match "nosql". Keywords split at "-", "/" or "'", such as
+    "pub/sub", are n-grams of their parts, so they match however the parts
+    are joined, e.g. "pub/sub" or "pub sub".
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        """
+        Build the n-gram index for the given keywords.
+
+        Args:
+            keywords: Lowercased keywords to match
+        """
+        self.keywords: Set[str] = {keyword for keyword in keywords if keyword}
+        self._index: Dict[str, Set[str]] = {}
+        # First token -> longer n-gram sizes that start with it
+        self._ngram_sizes: Dict[str, Tuple[int, ...]] = {}
+
+        sizes: Dict[str, Set[int]] = {}
+        for keyword in self.keywords:
+            tokens = tokenize(keyword)
+            if not tokens:
+                continue
+            self._index.setdefault(' '.join(tokens), set()).add(keyword)
+            if len(tokens) > 1:
+                sizes.setdefault(tokens[0], set()).add(len(tokens))
+        self._ngram_sizes = {token: tuple(sorted(n)) for token, n in sizes.items()}
+
+    def find(self, text: str) -> Set[str]:
+        """
+        Find every keyword occurring as a whole-token sequence in the text.
+
+        Args:
+            text: Lowercased document text
+
+        Returns:
+            Set[str]: Keywords found at least once in the text
+        """
+        index, ngram_sizes = self._index, self._ngram_sizes
+        tokens = tokenize(text)
+        hits: Set[str] = set()
+        for position, token in enumerate(tokens):
+            matched = index.get(token)
+            if matched:
+                hits.update(matched)
+            for size in ngram_sizes.get(token, ()):
+                matched = index.get(' '.join(tokens[position:position + size]))
+                if matched:
+                    hits.update(matched)
+        return hits
+
+
+def build_keyword_matcher(keywords: Iterable[str], backend: str = 'aho_corasick'):
+    """
+    Build the keyword matcher used by analyze_reddit_trends.
+
+    Args:
+        keywords: Lowercased keywords, as returned by load_keywords_from_s3
+        backend: 'aho_corasick' for substring matching or 'token' for
+            whole-token matching
+
+    Returns:
+        AhoCorasickMatcher | TokenIndexMatcher: Compiled matcher for the keyword set
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if backend == 'aho_corasick':
+        return AhoCorasickMatcher(keywords)
+    if backend == 'token':
+        return TokenIndexMatcher(keywords)
+    raise ValueError(f"Unknown matcher backend '{backend}', expected one of {MATCHER_BACKENDS}")
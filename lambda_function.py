@@ -1,27 +1,185 @@
+from __future__ import annotations
+
+import time
+
+# Start of module initialization, reported in the response of a cold start
+_INIT_START = time.perf_counter()
+
 import os
 import json
-import praw
-import boto3
 import csv
+import gzip
+import heapq
+import importlib
 import io
+import pickle
+import sys
 import uuid
-from datetime import datetime, timedelta, date
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, date, timezone
 from collections import Counter
-from typing import Dict, Set, Tuple, Any, Optional, List
-from snowflake.connector import connect, SnowflakeConnection
-from snowflake.connector.cursor import SnowflakeCursor
-from snowflake.connector.errors import Error, OperationalError, ProgrammingError
+from typing import TYPE_CHECKING, Dict, Set, Tuple, Any, Optional, List, Iterator, Callable
+from botocore.exceptions import ClientError
+from keyword_matcher import build_keyword_matcher
+from dedup import DocumentDeduplicator
+from match_pool import MatchWorkerPool, aggregate_documents
+from pipeline import WEIGHT_METRICS, Document, new_daily_counters, normalize_documents, prefetch
+from reddit_fixtures import FixtureRecorder, iter_fixture_documents
+from snapshot_store import encode_snapshot, snapshot_key
+from trend_engine import TrendState, detect_spikes
+from timing import TIMINGS, emf_record, span, timed_iter
 
-try:
-    import config as cfg  # Local development settings
-except ImportError:
-    raise ImportError(
-        "Missing 'config.py'. Please create a 'config.py' file based on 'config_template.py' and fill in the required settings."
-        )
+if TYPE_CHECKING:
+    import praw
+    from snowflake.connector import SnowflakeConnection
+    from snowflake.connector.cursor import SnowflakeCursor
 
-def get_secrets() -> Dict[str, str]:
+def import_on_first_use(name: str) -> Any:
     """
-    Retrieve secrets from AWS Secrets Manager.
+    Import a heavy dependency the first time it is needed.
+
+    praw, boto3 and the Snowflake connector each take hundreds of milliseconds
+    to import, so they are loaded by the code paths that use them rather than
+    at module load. The first import is recorded under an 'import_<package>' span.
+
+    Args:
+        name: Module name, e.g. 'snowflake.connector'
+
+    Returns:
+        Any: The imported module
+    """
+    module = sys.modules.get(name)
+    if module is None:
+        with span(f"import_{name.split('.')[0]}"):
+            module = importlib.import_module(name)
+    return module
+
+class LazyConfig:
+    """
+    Stand-in for the config module that imports it on first attribute access.
+
+    Lets lambda_function be imported, e.g. by benchmarks or tooling, without a
+    config.py; the missing file is reported when a setting is first read.
+    """
+
+    def _module(self) -> Any:
+        try:
+            return importlib.import_module('config')  # Local development settings
+        except ImportError:
+            raise ImportError(
+                "Missing 'config.py'. Please create a 'config.py' file based on 'config_template.py' and fill in the required settings."
+                )
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._module(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._module(), name, value)
+
+cfg = LazyConfig()
+
+class ResourceRegistry:
+    """
+    Lazily created clients kept at module scope so warm Lambda invocations reuse them.
+    """
+
+    def __init__(self):
+        self._resources: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def get(self, name: str, factory: Callable[[], Any],
+            is_alive: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Return the cached resource, creating it on first use or when it is no longer alive.
+
+        Args:
+            name: Registry key of the resource
+            factory: Creates a new resource
+            is_alive: Optional liveness check for a cached resource
+
+        Returns:
+            Any: The cached or newly created resource
+        """
+        with self._lock:
+            resource = self._resources.get(name)
+            if resource is not None:
+                if is_alive is None or is_alive(resource):
+                    print(f"Reusing cached {name}")
+                    return resource
+                print(f"Cached {name} is no longer alive, reconnecting")
+                self.discard(name)
+            resource = factory()
+            self._resources[name] = resource
+            return resource
+
+    def discard(self, name: str) -> None:
+        """
+        Drop a cached resource, closing it when possible, so the next get() recreates it.
+
+        Args:
+            name: Registry key of the resource
+        """
+        with self._lock:
+            resource = self._resources.pop(name, None)
+        if resource is not None and hasattr(resource, 'close'):
+            try:
+                resource.close()
+            except Exception as e:
+                print(f"Error closing {name}: {str(e)}")
+
+# Survives across warm invocations of the same execution environment
+RESOURCES = ResourceRegistry()
+
+def get_boto3_client(service_name: str, region_name: Optional[str] = None) -> Any:
+    """
+    Get a cached boto3 client for an AWS service.
+
+    Args:
+        service_name: AWS service name, e.g. 's3'
+        region_name: Optional region override
+
+    Returns:
+        Any: The boto3 client
+    """
+    return RESOURCES.get(f"boto3 {service_name} client",
+                         lambda: import_on_first_use('boto3').session.Session().client(service_name=service_name, region_name=region_name))
+
+# Snowflake error codes for rejected credentials (incorrect username/password, invalid JWT)
+SNOWFLAKE_AUTH_ERRNOS = {390100, 390144}
+
+# In-process secrets cache, reused by warm invocations until SECRETS_TTL_SECONDS expires
+_SECRETS_CACHE: Dict[str, Any] = {}
+
+def _read_secrets_file(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_secrets_file(path: str, entry: Dict[str, Any]) -> None:
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+    except OSError as e:
+        print(f"Could not persist secrets cache to {path}: {str(e)}")
+
+@span('secrets')
+def get_secrets(force_refresh: bool = False) -> Dict[str, str]:
+    """
+    Retrieve secrets from AWS Secrets Manager, served from a TTL cache when fresh.
+
+    The cache lives in process memory and, when SECRETS_CACHE_PATH is set, in a
+    file under /tmp so re-created execution environments can skip the network call.
+    Entries are keyed by SECRET_NAME, so changing it fetches the new secret.
+
+    Args:
+        force_refresh: Bypass the cache, e.g. after the secrets were rejected
 
     Returns:
         Dict[str, str]: Dictionary containing secret keys and their corresponding values.
@@ -29,62 +187,130 @@ def get_secrets() -> Dict[str, str]:
     Raises:
         Exception: If there is an error while fetching or parsing the secrets.
     """
-    start = datetime.now()
-    print(f"Starting secrets retrieval at {start}")
+    ttl = getattr(cfg, 'SECRETS_TTL_SECONDS', 900)
+    cache_path = getattr(cfg, 'SECRETS_CACHE_PATH', None)
+    
+    if not force_refresh:
+        # The file is only read when the memory cache misses
+        for source, read in (('memory', lambda: _SECRETS_CACHE),
+                             ('file', lambda: cache_path and _read_secrets_file(cache_path))):
+            entry = read()
+            if (entry and entry.get('secret_id') == cfg.SECRET_NAME
+                    and time.time() - entry['fetched_at'] < ttl):
+                _SECRETS_CACHE.update(entry)
+                print(f"Secrets served from cache ({source})")
+                return entry['value']
     
-    session = boto3.session.Session()
-    client = session.client(service_name='secretsmanager', region_name=cfg.REGION_NAME)
+    client = get_boto3_client('secretsmanager', cfg.REGION_NAME)
     
     try:
         response = client.get_secret_value(SecretId=cfg.SECRET_NAME)
         secret = json.loads(response['SecretString'])
-        end = datetime.now()
-        print(f"Secrets retrieval took: {end - start}")
+        entry = {'secret_id': cfg.SECRET_NAME, 'value': secret, 'fetched_at': time.time()}
+        _SECRETS_CACHE.update(entry)
+        if cache_path:
+            _write_secrets_file(cache_path, entry)
+        print(f"Secrets fetched from Secrets Manager (cache {'refresh' if force_refresh else 'miss'})")
         return secret
     except Exception as e:
         print(f"Error retrieving secrets: {str(e)}")
         raise
 
-def get_snowflake_connection() -> SnowflakeConnection:
-    """
-    Establish a connection to the Snowflake database.
-
-    Returns:
-        SnowflakeConnection: A connected Snowflake database connection object.
+def _open_snowflake_session(secrets: Dict[str, str]) -> SnowflakeConnection:
+    return import_on_first_use('snowflake.connector').connect(
+        user=secrets['user'],
+        password=secrets['password'],
+        account=secrets['account'],
+        warehouse=secrets['warehouse'],
+        database=secrets['database'],
+        schema=secrets['schema'],
+        client_session_keep_alive=True
+    )
 
-    Raises:
-        Error: If a Snowflake-specific error occurs during connection.
-    """
-    start = datetime.now()
-    print(f"Starting Snowflake connection at {start}")
-    
+@span('snowflake_connect')
+def _connect_snowflake() -> SnowflakeConnection:
+    connector = import_on_first_use('snowflake.connector')
     secrets = get_secrets()
     try:
-        conn = connect(
-            user=secrets['user'],
-            password=secrets['password'],
-            account=secrets['account'],
-            warehouse=secrets['warehouse'],
-            database=secrets['database'],
-            schema=secrets['schema']
-        )
+        try:
+            conn = _open_snowflake_session(secrets)
+        except connector.DatabaseError as e:
+            if e.errno not in SNOWFLAKE_AUTH_ERRNOS:
+                raise
+            # Credentials may have been rotated since they were cached
+            print(f"Snowflake rejected cached credentials ({e.errno}), retrying with fresh secrets")
+            secrets = get_secrets(force_refresh=True)
+            conn = _open_snowflake_session(secrets)
         
         # Explicitly set database and schema
         cur: SnowflakeCursor = conn.cursor()
         cur.execute(f"USE DATABASE {secrets['database']}")
         cur.execute(f"USE SCHEMA {secrets['schema']}")
         cur.close()
-        
-        end = datetime.now()
-        print(f"Snowflake connection took: {end - start}")
         return conn
-    except Error as e:
+    except connector.Error as e:
         print(f"Snowflake error: {str(e)}")
         raise
 
+def _snowflake_is_alive(conn: SnowflakeConnection) -> bool:
+    connector = import_on_first_use('snowflake.connector')
+    if conn.is_closed():
+        return False
+    try:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT 1")
+        finally:
+            cur.close()
+        return True
+    except connector.Error as e:
+        print(f"Snowflake liveness check failed: {str(e)}")
+        return False
+
+def get_snowflake_connection() -> SnowflakeConnection:
+    """
+    Get the Snowflake connection, reusing the one from a previous warm invocation while it is alive.
+
+    Returns:
+        SnowflakeConnection: A connected Snowflake database connection object.
+
+    Raises:
+        Error: If a Snowflake-specific error occurs during connection.
+    """
+    return RESOURCES.get('Snowflake connection', _connect_snowflake, _snowflake_is_alive)
+
+def get_reddit_settings() -> Dict[str, Any]:
+    """
+    Build the client settings shared by the praw and asyncpraw connections.
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for praw.Reddit / asyncpraw.Reddit
+
+    Raises:
+        KeyError: If a required environment variable is missing.
+    """
+    settings = {
+        'client_id': os.environ['REDDIT_CLIENT_ID'],
+        'client_secret': os.environ['REDDIT_CLIENT_SECRET'],
+        'user_agent': os.environ['REDDIT_USER_AGENT']
+    }
+    # e.g. {"oauth_url": ..., "reddit_url": ...} to point at a local fake Reddit
+    settings.update(getattr(cfg, 'REDDIT_API_OVERRIDES', {}))
+    return settings
+
+@span('reddit_connect')
+def _connect_reddit() -> praw.Reddit:
+    try:
+        # Every request of every client, token grants included, takes a slot from the one shared budget
+        session = RateLimitedSession(import_on_first_use('requests').Session(), get_rate_limiter())
+        return import_on_first_use('praw').Reddit(requestor_kwargs={'session': session}, **get_reddit_settings())
+    except Exception as e:
+        print(f"Reddit connection error: {str(e)}")
+        raise
+
 def get_reddit_connection() -> praw.Reddit:
     """
-    Establish a connection to Reddit using PRAW.
+    Get the PRAW Reddit client, reusing the one from a previous warm invocation.
 
     Returns:
         praw.Reddit: An authenticated Reddit API client.
@@ -92,238 +318,1481 @@ def get_reddit_connection() -> praw.Reddit:
     Raises:
         Exception: If the environment variables are missing or incorrect.
     """
-    start = datetime.now()
-    print(f"Starting Reddit connection at {start}")
-    
+    return RESOURCES.get('Reddit client', _connect_reddit)
+
+class RedditClientPool:
+    """
+    Idle PRAW clients, each checked out by one thread at a time.
+
+    praw and prawcore are not thread-safe: token refreshes and rate limit
+    state are updated without locking. Threads reading subreddit listings or
+    fetching comment forests concurrently each check out a client of their
+    own, waiting when max_clients are in use. Clients return to the pool
+    afterwards and are reused by warm invocations, so each one authenticates
+    once per execution environment.
+    """
+
+    def __init__(self, factory: Callable[[], praw.Reddit], max_clients: int):
+        """
+        Args:
+            factory: Creates a new authenticated client when none is idle
+            max_clients: Most clients created, and so checked out at once
+        """
+        self._factory = factory
+        self._idle: List[praw.Reddit] = []
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(max(1, max_clients))
+
+    @contextmanager
+    def checkout(self) -> Iterator[praw.Reddit]:
+        """
+        Borrow a client for the calling thread's exclusive use, waiting for one to be returned if needed.
+
+        Yields:
+            praw.Reddit: An authenticated Reddit API client
+        """
+        with span('reddit_client_wait'):
+            self._slots.acquire()
+        try:
+            with self._lock:
+                client = self._idle.pop() if self._idle else None
+            if client is None:
+                client = self._factory()
+            try:
+                yield client
+            finally:
+                with self._lock:
+                    self._idle.append(client)
+        finally:
+            self._slots.release()
+
+def get_reddit_clients() -> RedditClientPool:
+    """
+    Get the pool of PRAW clients for concurrent ingestion, reusing the one from a previous warm invocation.
+
+    Each of the SUBREDDIT_WORKERS listings holds a client while it is read,
+    and COMMENT_FETCH_WORKERS more are shared by the comment fetches of all
+    subreddits, so that many fetches run at once in total.
+
+    Returns:
+        RedditClientPool: Clients to check out one per thread
+    """
+    max_clients = max(1, getattr(cfg, 'SUBREDDIT_WORKERS', 4)) + max(1, getattr(cfg, 'COMMENT_FETCH_WORKERS', 1))
+    return RESOURCES.get('Reddit client pool', lambda: RedditClientPool(_connect_reddit, max_clients))
+
+# Parsed keywords and compiled matchers for the last seen ETag of the keywords file
+_KEYWORDS_CACHE: Dict[str, Any] = {}
+
+# Bump when the cached keywords or the matchers' pickled state change, e.g. how keywords are tokenized
+KEYWORDS_CACHE_VERSION = 3
+
+def _keywords_cache_path() -> Optional[str]:
+    cache_dir = getattr(cfg, 'KEYWORDS_CACHE_DIR', '/tmp')
+    return os.path.join(cache_dir, 'reddit_tracker_keywords.pickle') if cache_dir else None
+
+def _load_keywords_cache() -> None:
+    path = _keywords_cache_path()
+    if _KEYWORDS_CACHE or not path:
+        return
     try:
-        reddit = praw.Reddit(
-            client_id=os.environ['REDDIT_CLIENT_ID'],
-            client_secret=os.environ['REDDIT_CLIENT_SECRET'],
-            user_agent=os.environ['REDDIT_USER_AGENT']
-        )
-        end = datetime.now()
-        print(f"Reddit connection took: {end - start}")
-        return reddit
+        with open(path, 'rb') as f:
+            entry = pickle.load(f)
     except Exception as e:
-        print(f"Reddit connection error: {str(e)}")
-        raise
+        # Missing, truncated, or written by code whose classes no longer load: rebuild
+        if not isinstance(e, FileNotFoundError):
+            print(f"Ignoring unreadable keywords cache {path}: {str(e)}")
+        return
+    if (isinstance(entry, dict) and entry.get('version') == KEYWORDS_CACHE_VERSION
+            and entry.get('source') == (cfg.BUCKET_NAME, cfg.KEYWORDS_KEY)):
+        _KEYWORDS_CACHE.update(entry)
 
+def _save_keywords_cache() -> None:
+    path = _keywords_cache_path()
+    if not path:
+        return
+    try:
+        # Write then rename so a concurrent reader never sees a partial file
+        with open(f"{path}.tmp", 'wb') as f:
+            pickle.dump(_KEYWORDS_CACHE, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{path}.tmp", path)
+    except OSError as e:
+        print(f"Could not persist keywords cache to {path}: {str(e)}")
+
+def parse_keywords_csv(csv_content: str) -> Set[str]:
+    """
+    Parse the keywords CSV into a set of lowercased keywords.
+
+    Args:
+        csv_content: Decoded CSV file content
+
+    Returns:
+        Set[str]: A set of unique keywords.
+    """
+    keywords: Set[str] = set()
+    for row in csv.reader(io.StringIO(csv_content)):
+        keywords.update(word.lower().strip() for word in row if word.strip())
+    return keywords
+
+@span('s3_keywords')
 def load_keywords_from_s3() -> Set[str]:
     """
     Load keywords from a CSV file stored in an S3 bucket.
 
+    The parsed set is cached in memory and under KEYWORDS_CACHE_DIR keyed by
+    the object's ETag, and the file is fetched with a conditional GET so an
+    unchanged file is never downloaded or parsed again.
+
     Returns:
         Set[str]: A set of unique keywords loaded from the S3 file.
 
     Raises:
         Exception: If an error occurs while accessing or processing the S3 file.
     """
-    start = datetime.now()
-    print(f"Starting S3 keywords load at {start}")
     print(f"Attempting to load from bucket: {cfg.BUCKET_NAME}, key: {cfg.KEYWORDS_KEY}")
     
-    s3 = boto3.client('s3')
+    s3 = get_boto3_client('s3')
     try:
-        # List bucket contents for debugging
-        print("Listing bucket contents:")
-        list_start = datetime.now()
-        response = s3.list_objects_v2(Bucket=cfg.BUCKET_NAME, Prefix='data_eng/')
-        for obj in response.get('Contents', []):
-            print(f"Found object: {obj['Key']}")
-        print(f"Listing bucket contents took: {datetime.now() - list_start}")
+        if getattr(cfg, 'DEBUG_S3_LISTING', False):
+            # List bucket contents for debugging
+            print("Listing bucket contents:")
+            with span('s3_list'):
+                response = s3.list_objects_v2(Bucket=cfg.BUCKET_NAME, Prefix='data_eng/')
+            for obj in response.get('Contents', []):
+                print(f"Found object: {obj['Key']}")
+        
+        # Get the file unless it still matches the cached ETag
+        _load_keywords_cache()
+        cached_etag = _KEYWORDS_CACHE.get('etag')
+        request = {'Bucket': cfg.BUCKET_NAME, 'Key': cfg.KEYWORDS_KEY}
+        if cached_etag:
+            request['IfNoneMatch'] = cached_etag
         
-        # Get and process the file
-        get_start = datetime.now()
-        obj = s3.get_object(Bucket=cfg.BUCKET_NAME, Key=cfg.KEYWORDS_KEY)
-        csv_content = obj['Body'].read().decode('utf-8')
-        print(f"Getting S3 object took: {datetime.now() - get_start}")
+        try:
+            with span('s3_get'):
+                obj = s3.get_object(**request)
+                csv_content = obj['Body'].read().decode('utf-8')
+        except ClientError as e:
+            if e.response.get('ResponseMetadata', {}).get('HTTPStatusCode') != 304:
+                raise
+            keywords = _KEYWORDS_CACHE['keywords']
+            print(f"Loaded {len(keywords)} keywords from cache, unchanged since ETag {cached_etag}")
+            return keywords
         
         # Process keywords
-        process_start = datetime.now()
-        keywords: Set[str] = set()
-        for row in csv.reader(io.StringIO(csv_content)):
-            keywords.update(word.lower().strip() for word in row if word.strip())
-        print(f"Processing keywords took: {datetime.now() - process_start}")
+        with span('keywords_parse'):
+            keywords = parse_keywords_csv(csv_content)
         
-        end = datetime.now()
-        print(f"Total S3 keywords load took: {end - start}")
+        _KEYWORDS_CACHE.clear()
+        _KEYWORDS_CACHE.update(version=KEYWORDS_CACHE_VERSION, source=(cfg.BUCKET_NAME, cfg.KEYWORDS_KEY),
+                               etag=obj['ETag'], keywords=keywords, matchers={})
+        _save_keywords_cache()
         print(f"Loaded {len(keywords)} keywords")
         return keywords
     except Exception as e:
         print(f"S3 error: {str(e)}")
         raise
 
-def analyze_reddit_trends() -> Tuple[Dict[str, int], date]:
+def load_keyword_matcher() -> Any:
+    """
+    Load the keywords from S3 and return the compiled matcher for them.
+
+    Compiled matchers are cached alongside the keywords, so the automaton or
+    index is only rebuilt when the keywords file or MATCHER_BACKEND changes.
+
+    Returns:
+        Any: Compiled keyword matcher for the configured backend
+    """
+    keywords = load_keywords_from_s3()
+    backend = getattr(cfg, 'MATCHER_BACKEND', 'aho_corasick')
+    matchers = _KEYWORDS_CACHE.setdefault('matchers', {})
+    if backend in matchers:
+        print(f"Reusing cached {backend} keyword matcher")
+        return matchers[backend]
+    
+    with span('matcher_build'):
+        matchers[backend] = build_keyword_matcher(keywords, backend)
+    print(f"Built {backend} keyword matcher")
+    _save_keywords_cache()
+    return matchers[backend]
+
+class RateLimiter:
+    """
+    Thread-safe token bucket that keeps concurrent Reddit requests inside the API budget.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: int):
+        """
+        Args:
+            requests_per_minute: Sustained request rate allowed
+            burst: Number of requests that may be issued back to back
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Block until a request slot is available.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class RateLimitedSession:
+    """
+    HTTP session for a praw client that takes a rate limiter slot before every request.
+
+    Wraps the requests.Session given to prawcore, so listing pages, comment
+    forests, "load more comments" expansions and OAuth token grants all count
+    against the shared budget, whichever client makes them. Time spent waiting
+    is recorded under the 'rate_limit_wait' span.
+    """
+
+    def __init__(self, session: Any, rate_limiter: RateLimiter):
+        """
+        Args:
+            session: requests.Session making the requests
+            rate_limiter: Limiter shared by all clients
+        """
+        self._session = session
+        self._rate_limiter = rate_limiter
+
+    def request(self, *args: Any, **kwargs: Any) -> Any:
+        with span('rate_limit_wait'):
+            self._rate_limiter.acquire()
+        return self._session.request(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        # headers, close() and the rest of the session interface
+        return getattr(self._session, name)
+
+def configure_comment_fetch(post: Any, window_start: int, created_utc: float) -> None:
+    """
+    Bound the comment forest a submission will fetch, before its comments are first accessed.
+
+    Reddit returns up to INITIAL_COMMENT_FETCH comments in COMMENT_SORT order,
+    so with the default "top" sort the best-scoring comments are always included.
+    Posts from the lookback are fetched newest first instead: only their late
+    comments are counted, and those score too low to make a "top" fetch of a
+    busy post.
+
+    Args:
+        post: praw or asyncpraw submission
+        window_start: Window start as a UTC timestamp
+        created_utc: Creation time of the post, as listed
+    """
+    post.comment_limit = cfg.INITIAL_COMMENT_FETCH
+    post.comment_sort = 'new' if created_utc < window_start else getattr(cfg, 'COMMENT_SORT', 'top')
+
+def replace_more_budget() -> Dict[str, int]:
+    """
+    Read how many "load more comments" stubs a fetch may expand.
+
+    Each expanded stub costs one extra API request, so REPLACE_MORE_LIMIT
+    caps the requests per post; REPLACE_MORE_THRESHOLD skips stubs hiding
+    fewer comments than that.
+
+    Returns:
+        Dict[str, int]: Keyword arguments for CommentForest.replace_more()
+    """
+    return {'limit': getattr(cfg, 'REPLACE_MORE_LIMIT', 0),
+            'threshold': getattr(cfg, 'REPLACE_MORE_THRESHOLD', 0)}
+
+def select_top_comments(comments: List[Any], window_start: int, window_end: int) -> List[Any]:
+    """
+    Pick the highest-scoring comments from a flattened comment forest.
+
+    Only comments written inside the window and down to MAX_COMMENT_DEPTH are
+    candidates: on a lookback post the best-scoring comments predate the
+    window, so ranking first and filtering after would drop the comments that
+    can be counted. Keeps a bounded heap of TOP_COMMENTS_LIMIT candidates
+    instead of sorting them all.
+
+    Args:
+        comments: Flattened comments of a post
+        window_start: Window start as a UTC timestamp
+        window_end: Window end (exclusive) as a UTC timestamp
+
+    Returns:
+        List[Any]: Up to TOP_COMMENTS_LIMIT in-window comments, highest score first
+    """
+    max_depth = getattr(cfg, 'MAX_COMMENT_DEPTH', None)
+    comments = (comment for comment in comments
+                if window_start <= getattr(comment, 'created_utc', window_end) < window_end
+                and (max_depth is None or getattr(comment, 'depth', 0) <= max_depth))
+    return heapq.nlargest(cfg.TOP_COMMENTS_LIMIT, comments, key=lambda x: getattr(x, 'score', 0))
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get the rate limiter sized from the configured Reddit request budget, shared by every praw client.
+
+    Returns:
+        RateLimiter: Limiter shared by all Reddit requests of this execution environment
+    """
+    return RESOURCES.get('Reddit rate limiter', lambda: RateLimiter(getattr(cfg, 'REDDIT_REQUESTS_PER_MINUTE', 90),
+                                                                    getattr(cfg, 'REDDIT_REQUEST_BURST', 10)))
+
+class CommentCursor:
+    """
+    Per-post comment high-water marks, persisted between runs.
+
+    For each post whose comments were fetched it keeps the comment count and
+    the creation time of the newest comment seen. A post is only fetched again
+    when it has new activity, or when its newest comment falls inside the
+    window being counted, so re-running a day still sees all of its comments.
+    """
+
+    def __init__(self, posts: Optional[Dict[str, Dict[str, float]]] = None):
+        """
+        Args:
+            posts: High-water marks keyed by post id, as stored by to_json()
+        """
+        self.posts = posts or {}
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def should_fetch(self, post: Any, window_start: int) -> bool:
+        """
+        Decide whether a post can have comments inside the window that we have not counted.
+
+        Args:
+            post: Submission from a listing
+            window_start: Window start as a UTC timestamp
+
+        Returns:
+            bool: False if the post is unchanged since its newest comment, which predates the window
+        """
+        with self._lock:
+            mark = self.posts.get(post.id)
+            if mark is None or mark['num_comments'] != post.num_comments or mark['last_comment_utc'] >= window_start:
+                return True
+            self.skipped += 1
+            return False
+
+    def update(self, post: Any, comments: List[Any]) -> None:
+        """
+        Record the newest comment of a freshly fetched comment forest.
+
+        Args:
+            post: Submission whose comments were fetched
+            comments: Its flattened comments
+        """
+        last_comment_utc = max((comment.created_utc for comment in comments if hasattr(comment, 'created_utc')),
+                               default=0)
+        with self._lock:
+            self.posts[post.id] = {'created_utc': post.created_utc, 'num_comments': post.num_comments,
+                                   'last_comment_utc': last_comment_utc}
+
+    def prune(self, oldest_utc: float) -> None:
+        """
+        Forget posts created before the oldest post later runs will revisit.
+
+        Args:
+            oldest_utc: Creation time, as a UTC timestamp, below which posts are dropped
+        """
+        with self._lock:
+            self.posts = {post_id: mark for post_id, mark in self.posts.items() if mark['created_utc'] >= oldest_utc}
+
+    def to_json(self) -> str:
+        """
+        Serialize the cursor for storage.
+
+        Returns:
+            str: JSON document
+        """
+        with self._lock:
+            return json.dumps({'posts': self.posts})
+
+def load_comment_cursor() -> Optional[CommentCursor]:
+    """
+    Load the comment cursor from COMMENT_CURSOR_KEY in the S3 bucket.
+
+    Returns:
+        Optional[CommentCursor]: The stored cursor, an empty one on the first run,
+        or None when COMMENT_CURSOR_KEY is not configured
+    """
+    key = getattr(cfg, 'COMMENT_CURSOR_KEY', None)
+    if not key:
+        return None
+    
+    try:
+        with span('comment_cursor_load'):
+            obj = get_boto3_client('s3').get_object(Bucket=cfg.BUCKET_NAME, Key=key)
+            cursor = CommentCursor(json.loads(obj['Body'].read())['posts'])
+        print(f"Loaded comment cursor for {len(cursor.posts)} posts")
+        return cursor
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'NoSuchKey':
+            raise
+        print(f"No comment cursor at s3://{cfg.BUCKET_NAME}/{key}, starting a new one")
+        return CommentCursor()
+
+def save_comment_cursor(cursor: CommentCursor) -> None:
+    """
+    Store the comment cursor at COMMENT_CURSOR_KEY in the S3 bucket.
+
+    Args:
+        cursor: Cursor to store
+    """
+    with span('comment_cursor_save'):
+        get_boto3_client('s3').put_object(Bucket=cfg.BUCKET_NAME, Key=cfg.COMMENT_CURSOR_KEY,
+                                          Body=cursor.to_json().encode('utf-8'),
+                                          ContentType='application/json')
+    print(f"Saved comment cursor for {len(cursor.posts)} posts, {cursor.skipped} inactive posts skipped")
+
+def fetch_top_comments(post: Any, window_start: int, window_end: int,
+                       cursor: Optional[CommentCursor] = None,
+                       clients: Optional[RedditClientPool] = None) -> List[Any]:
+    """
+    Fetch a post's comment forest and select its top comments by score among those written inside the window.
+
+    Args:
+        post: PRAW submission whose comments should be fetched
+        window_start: Window start as a UTC timestamp
+        window_end: Window end (exclusive) as a UTC timestamp
+        cursor: Comment cursor to advance once the fetch succeeds
+        clients: Pool to fetch with from a worker thread, None to use the client the post was listed with
+
+    Returns:
+        List[Any]: Up to TOP_COMMENTS_LIMIT comments, empty if the fetch failed
+    """
+    try:
+        with clients.checkout() if clients is not None else nullcontext() as reddit:
+            with span('comment_fetch'):
+                created_utc = post.created_utc
+                if reddit is not None:
+                    # Same single request as fetching through the listing's client, which another thread is using
+                    post = reddit.submission(id=post.id)
+                configure_comment_fetch(post, window_start, created_utc)
+                post.comments.replace_more(**replace_more_budget())
+                comments = post.comments.list()
+        if cursor is not None:
+            cursor.update(post, comments)
+        return select_top_comments(comments, window_start, window_end)
+    except Exception as e:
+        print(f"Error processing comments for post {post.id}: {str(e)}")
+        return []
+
+def get_date_window(start_date: date, end_date: date) -> Tuple[int, int]:
+    """
+    Calculate the UTC timestamp range covering whole days from start_date to end_date.
+
+    Args:
+        start_date: First day of the window
+        end_date: Last day of the window, inclusive
+
+    Returns:
+        Tuple[int, int]: Window start (inclusive) and end (exclusive) as UTC timestamps
+    """
+    window_start = int(datetime(start_date.year, start_date.month, start_date.day, tzinfo=timezone.utc).timestamp())
+    window_end = int(datetime(end_date.year, end_date.month, end_date.day, tzinfo=timezone.utc).timestamp()) + 86400
+    return window_start, window_end
+
+def get_lookback_start(window_start: int) -> int:
+    """
+    Find the oldest post creation time whose new comments are still counted.
+
+    Posts created up to COMMENT_LOOKBACK_DAYS before the window are revisited,
+    since they keep collecting comments after the day they were posted.
+
+    Args:
+        window_start: Window start as a UTC timestamp
+
+    Returns:
+        int: Lookback start as a UTC timestamp
+    """
+    return window_start - 86400 * getattr(cfg, 'COMMENT_LOOKBACK_DAYS', 0)
+
+def is_before_window(post: Any, window_start: int) -> bool:
+    """
+    Check whether a newest-first listing has moved past the start of the window.
+
+    Pinned posts are ignored since they can be older than the posts around them.
+
+    Args:
+        post: Submission from subreddit.new()
+        window_start: Window start as a UTC timestamp
+
+    Returns:
+        bool: True if this and every later post in the listing predate the window
+    """
+    return post.created_utc < window_start and not getattr(post, 'stickied', False)
+
+def report_incomplete_listing(subreddit_name: str, scanned: int, lookback_start: int) -> None:
+    """
+    Warn that a listing ended before reaching a post older than the lookback.
+
+    Reddit serves at most about 1000 posts of a listing and MAX_LISTING_POSTS
+    may stop it sooner, so in a busy subreddit the oldest posts in range, and
+    their comments, were never seen.
+
+    Args:
+        subreddit_name: Subreddit whose listing ended
+        scanned: Posts read from the listing
+        lookback_start: Lookback start as a UTC timestamp
+    """
+    print(f"Warning: r/{subreddit_name} listing ended after {scanned} posts without reaching "
+          f"{datetime.fromtimestamp(lookback_start, timezone.utc)}; counts for the oldest days may be incomplete "
+          f"(MAX_LISTING_POSTS or Reddit's ~1000 post listing limit)")
+
+def post_documents(post: Any, subreddit_name: str) -> List[Document]:
+    """
+    Turn a submission's title and selftext into pipeline documents.
+
+    Args:
+        post: Reddit submission
+        subreddit_name: Subreddit the post was listed in
+
+    Returns:
+        List[Document]: The title document, plus the selftext if there is one
+    """
+    documents = [Document('title', post.id, subreddit_name, post.created_utc, post.title,
+                          post.score, post.num_comments)]
+    if post.selftext:
+        documents.append(Document('selftext', post.id, subreddit_name, post.created_utc, post.selftext,
+                                  post.score, post.num_comments))
+    return documents
+
+def comment_documents(comments: List[Any], subreddit_name: str) -> Iterator[Document]:
+    """
+    Turn the comments selected for a post into pipeline documents.
+
+    Args:
+        comments: In-window comments picked by select_top_comments()
+        subreddit_name: Subreddit the post was listed in
+
+    Yields:
+        Document: One document per comment
+    """
+    for comment in comments:
+        yield Document('comment', comment.id, subreddit_name, comment.created_utc,
+                       comment.body if hasattr(comment, 'body') else "", getattr(comment, 'score', 0))
+
+def iter_subreddit_documents(reddit: Optional[praw.Reddit], subreddit_name: str, start_date: date, end_date: date,
+                             cursor: Optional[CommentCursor] = None,
+                             truncated_listings: Optional[Dict[str, float]] = None) -> Iterator[Document]:
+    """
+    Document source: stream a subreddit's posts and top comments inside a date range.
+
+    Walks the newest-first listing once, stopping as soon as posts predate the
+    range, or the COMMENT_LOOKBACK_DAYS before it. Posts from the lookback
+    contribute only their comments created inside the range, and with a
+    comment cursor are only fetched when they have new activity. Comment
+    forests are fetched by a COMMENT_FETCH_WORKERS thread pool with a bounded
+    number of fetches in flight, so memory stays constant however many posts
+    are in range. praw clients are not thread-safe, so the workers fetch with
+    clients checked out of get_reddit_clients(). A listing that ends before
+    the lookback records the oldest post time it reached in truncated_listings.
+
+    Args:
+        reddit: Client used by this listing only, or None to check one out of get_reddit_clients()
+        subreddit_name: Name of the subreddit to read
+        start_date: First day to include
+        end_date: Last day to include
+        cursor: Comment cursor shared with other subreddits, or None to fetch every post
+        truncated_listings: Oldest post time reached per subreddit whose listing was cut off, filled in
+
+    Yields:
+        Document: Titles, selftexts and in-window comments
+    """
+    window_start, window_end = get_date_window(start_date, end_date)
+    lookback_start = get_lookback_start(window_start)
+    clients = get_reddit_clients()
+    with clients.checkout() if reddit is None else nullcontext(reddit) as reddit:
+        subreddit = reddit.subreddit(subreddit_name)
+        workers = getattr(cfg, 'COMMENT_FETCH_WORKERS', 1)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='comments') if workers > 1 else None
+        pending = deque()
+    
+        post_count = 0
+        scanned = 0
+        oldest = window_end
+        try:
+            for post in timed_iter('reddit_listing', subreddit.new(limit=getattr(cfg, 'MAX_LISTING_POSTS', 1000))):
+                scanned += 1
+                if is_before_window(post, lookback_start):
+                    break
+                # Skip posts newer than the window, and pinned posts older than the lookback
+                if not (lookback_start <= post.created_utc < window_end):
+                    continue
+                oldest = min(oldest, post.created_utc)
+            
+                if post.created_utc >= window_start:
+                    post_count += 1
+                    if post_count % 10 == 0:
+                        print(f"Processed {post_count} posts from r/{subreddit_name} at {datetime.now()}")
+                    yield from post_documents(post, subreddit_name)
+                if cursor is not None and not cursor.should_fetch(post, window_start):
+                    continue
+            
+                if executor is None:
+                    yield from comment_documents(fetch_top_comments(post, window_start, window_end, cursor=cursor),
+                                                 subreddit_name)
+                else:
+                    pending.append(executor.submit(fetch_top_comments, post, window_start, window_end,
+                                                   cursor, clients))
+                    # Keep a bounded number of comment fetches in flight
+                    while len(pending) > 2 * workers:
+                        yield from comment_documents(pending.popleft().result(), subreddit_name)
+            else:
+                # No post predated the lookback, so the listing may have been cut off
+                report_incomplete_listing(subreddit_name, scanned, lookback_start)
+                if truncated_listings is not None:
+                    truncated_listings[subreddit_name] = oldest
+        
+            while pending:
+                yield from comment_documents(pending.popleft().result(), subreddit_name)
+            print(f"Read r/{subreddit_name} ({scanned} posts scanned)")
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+def get_document_source(reddit: Optional[praw.Reddit], subreddit_name: str, start_date: date, end_date: date,
+                        cursor: Optional[CommentCursor] = None,
+                        truncated_listings: Optional[Dict[str, float]] = None) -> Iterator[Document]:
+    """
+    Pick the document source for a subreddit: live Reddit, or a recorded fixture in replay mode.
+
+    Args:
+        reddit: Client used by this subreddit only, None to check one out; unused when replaying
+        subreddit_name: Name of the subreddit to read
+        start_date: First day to include
+        end_date: Last day to include
+        cursor: Comment cursor shared with other subreddits, unused when replaying
+        truncated_listings: Oldest post time reached per subreddit whose listing was cut off, unused when replaying
+
+    Returns:
+        Iterator[Document]: Titles, selftexts and in-window comments
+    """
+    if getattr(cfg, 'INGEST_MODE', 'sync') == 'replay':
+        return iter_fixture_documents(cfg.REPLAY_FIXTURE_PATH, subreddit_name, start_date, end_date)
+    return iter_subreddit_documents(reddit, subreddit_name, start_date, end_date, cursor, truncated_listings)
+
+def analyze_subreddit(reddit: Optional[praw.Reddit], matcher: Any, subreddit_name: str,
+                      start_date: date, end_date: date,
+                      match_pool: Optional[MatchWorkerPool] = None,
+                      recorder: Optional[FixtureRecorder] = None,
+                      cursor: Optional[CommentCursor] = None,
+                      deduplicator: Optional[DocumentDeduplicator] = None,
+                      truncated_listings: Optional[Dict[str, float]] = None
+                      ) -> Tuple[Dict[date, Counter], int, Dict[date, Dict[str, Counter]]]:
+    """
+    Count keyword mentions in a subreddit's posts and comments, bucketed per day.
+
+    Runs the streaming pipeline: document source -> normalizer -> matcher ->
+    aggregator. The source runs ahead in a background thread behind a queue of
+    PIPELINE_QUEUE_SIZE documents, so network fetches overlap with matching.
+    The listing is walked once for the whole date range; posts and comments
+    are each attributed to the UTC day they were created. With a match pool,
+    subreddits yielding at least PARALLEL_MATCH_MIN_DOCUMENTS documents are
+    matched across worker processes. A recorder captures the source's
+    documents for later replay. A deduplicator drops repeated texts after
+    normalization, so they are neither matched nor counted.
+
+    Args:
+        reddit: Client used by this subreddit only, or None to check one out of get_reddit_clients()
+        matcher: Compiled keyword matcher
+        subreddit_name: Name of the subreddit to analyze
+        start_date: First day to count
+        end_date: Last day to count, inclusive
+        match_pool: Started worker pool shared with other subreddits, or None to match in-process
+        recorder: Fixture recorder shared with other subreddits, or None to not record
+        cursor: Comment cursor shared with other subreddits, or None to fetch every post
+        deduplicator: Duplicate filter shared with other subreddits, or None to count every copy
+        truncated_listings: Oldest post time reached per subreddit whose listing was cut off, filled in
+
+    Returns:
+        Tuple[Dict[date, Counter], int, Dict[date, Dict[str, Counter]]]: Mention counts per day, the
+        number of posts analyzed, and the WEIGHT_METRICS sums per day
+    """
+    documents = get_document_source(reddit, subreddit_name, start_date, end_date, cursor, truncated_listings)
+    if recorder is not None:
+        documents = recorder.record(documents)
+    documents = normalize_documents(prefetch(documents, getattr(cfg, 'PIPELINE_QUEUE_SIZE', 1000)))
+    if deduplicator is not None:
+        documents = deduplicator.filter(documents)
+    aggregator = aggregate_documents(documents, matcher, start_date, end_date, match_pool,
+                                     getattr(cfg, 'PARALLEL_MATCH_MIN_DOCUMENTS', 20000),
+                                     getattr(cfg, 'MATCH_BATCH_SIZE', 2000))
+    
+    counts = aggregator.document_counts
+    print(f"Analyzed r/{subreddit_name} "
+          f"({counts['title']} posts, {counts['selftext']} selftexts, {counts['comment']} comments)")
+    return aggregator.daily_trends, counts['title'], aggregator.daily_weights
+
+def drop_unreached_days(trends: Dict[date, Dict[str, Dict[str, int]]],
+                        weights: Dict[date, Dict[str, Dict[str, Tuple[int, ...]]]],
+                        truncated_listings: Dict[str, float]) -> None:
+    """
+    Remove the days a cut-off listing never reached from the results to save.
+
+    Posts newer than the oldest one a listing reached were all seen, so only
+    days starting at or after it are complete. Saving an earlier day would
+    replace the counts of a past complete run with empty or partial ones, so
+    those days are left untouched in Snowflake and the snapshot files.
+
+    Args:
+        trends: Keyword mention counts per day and subreddit, updated in place
+        weights: WEIGHT_METRICS sums per day, subreddit and keyword, updated in place
+        truncated_listings: Oldest post time reached per subreddit whose listing was cut off
+    """
+    for name, oldest in sorted(truncated_listings.items()):
+        unreached = [day for day in sorted(trends) if get_date_window(day, day)[0] < oldest and name in trends[day]]
+        if not unreached:
+            continue
+        for day in unreached:
+            del trends[day][name]
+            del weights[day][name]
+            if not trends[day]:
+                del trends[day]
+                del weights[day]
+        print(f"Warning: not saving r/{name} for {unreached[0]} to {unreached[-1]}; its listing ended at "
+              f"{datetime.fromtimestamp(oldest, timezone.utc)}, so those days were not fully read")
+
+def get_deduplicator() -> Optional[DocumentDeduplicator]:
+    """
+    Create the duplicate filter for a run from the configuration.
+
+    Returns:
+        Optional[DocumentDeduplicator]: Filter to share between all subreddits, or None if DEDUP_DOCUMENTS is off
+    """
+    if not getattr(cfg, 'DEDUP_DOCUMENTS', False):
+        return None
+    return DocumentDeduplicator(getattr(cfg, 'DEDUP_MIN_CHARS', 32),
+                                getattr(cfg, 'NEAR_DUPLICATE_DISTANCE', 0))
+
+def get_subreddit_names() -> List[str]:
     """
-    Analyze Reddit posts and comments for keyword mentions from the previous day.
+    Read the subreddits to track from the configuration.
 
     Returns:
-        Tuple[Dict[str, int], date]: A tuple containing:
-            - Dictionary mapping keywords to their mention counts
-            - Date of the snapshot
+        List[str]: SUBREDDIT_NAMES, or the single SUBREDDIT_NAME for older configs
+    """
+    names = getattr(cfg, 'SUBREDDIT_NAMES', None) or [cfg.SUBREDDIT_NAME]
+    return list(dict.fromkeys(names))
+
+@span('reddit_analysis')
+def analyze_reddit_trends(start_date: Optional[date] = None,
+                          end_date: Optional[date] = None,
+                          deduplicator: Optional[DocumentDeduplicator] = None) -> Tuple[Dict[date, Dict[str, Dict[str, int]]],
+                                                                    Dict[date, Dict[str, Dict[str, Tuple[int, ...]]]]]:
+    """
+    Analyze Reddit posts and comments for keyword mentions per day.
+
+    Defaults to the previous day; a backfill passes an explicit date range,
+    which is still covered by a single walk of each subreddit listing. All
+    configured subreddits are processed in one invocation, sharing the Reddit
+    client, keyword matcher and rate limit budget. Uses the synchronous praw
+    client, the asyncpraw engine in async_ingest when INGEST_MODE is 'async',
+    or replays REPLAY_FIXTURE_PATH without network access when it is 'replay'.
+    Setting RECORD_FIXTURE_PATH records the documents seen by a live run, and
+    COMMENT_CURSOR_KEY keeps per-post comment high-water marks in S3 so posts
+    from the COMMENT_LOOKBACK_DAYS are only re-fetched when they have new comments.
+    A deduplicator shared by all subreddits counts each repeated text once per subreddit and day.
+    Days a cut-off listing never reached are left out of the results, so that
+    saving them does not wipe the counts of an earlier complete run.
+
+    Args:
+        start_date: First day to analyze, defaults to yesterday
+        end_date: Last day to analyze, inclusive, defaults to start_date
+        deduplicator: Filter skipping repeated texts, e.g. from get_deduplicator(), or None to count every copy
+
+    Returns:
+        Tuple[Dict[date, Dict[str, Dict[str, int]]], Dict[date, Dict[str, Dict[str, Tuple[int, ...]]]]]:
+        Keyword mention counts per day and subreddit, and the WEIGHT_METRICS sums of each keyword
 
     Raises:
         Exception: If there is an error during the Reddit API query or analysis process.
     """
-    start = datetime.now()
-    print(f"Starting Reddit analysis at {start}")
-    
     try:
-        # Get connections and keywords
-        conn_start = datetime.now()
-        reddit = get_reddit_connection()
-        keywords = load_keywords_from_s3()
-        print(f"Getting connections and keywords took: {datetime.now() - conn_start}")
+        ingest_mode = getattr(cfg, 'INGEST_MODE', 'sync')
+        if ingest_mode not in ('sync', 'async', 'replay'):
+            raise ValueError(f"Unknown INGEST_MODE '{ingest_mode}', expected 'sync', 'async' or 'replay'")
+        subreddit_names = get_subreddit_names()
+        start_date = start_date or (datetime.utcnow() - timedelta(days=1)).date()
+        end_date = end_date or start_date
         
-        trends = Counter()
-        subreddit = reddit.subreddit(cfg.SUBREDDIT_NAME)
+        # Get keywords; each subreddit checks out its own Reddit client
+        matcher = load_keyword_matcher()
         
-        # Calculate yesterday's date range
-        today = datetime.utcnow()
-        yesterday = today - timedelta(days=1)
-        yesterday_start = int(datetime(yesterday.year, yesterday.month, yesterday.day).timestamp())
-        yesterday_end = int(datetime(today.year, today.month, today.day).timestamp())
+        window_start, window_end = get_date_window(start_date, end_date)
+        print(f"Collecting posts from {datetime.fromtimestamp(window_start, timezone.utc)} "
+              f"to {datetime.fromtimestamp(window_end, timezone.utc)} in {len(subreddit_names)} subreddits")
         
-        print(f"Collecting posts from {datetime.fromtimestamp(yesterday_start)} to {datetime.fromtimestamp(yesterday_end)}")
+        record_path = getattr(cfg, 'RECORD_FIXTURE_PATH', None) if ingest_mode != 'replay' else None
+        recorder = FixtureRecorder(record_path) if record_path else None
+        cursor = load_comment_cursor() if ingest_mode != 'replay' else None
+        truncated_listings: Dict[str, float] = {}
+        match_pool = None
+        try:
+            if ingest_mode == 'async':
+                from async_ingest import analyze_subreddits_async
+                results = analyze_subreddits_async(matcher, subreddit_names, start_date, end_date,
+                                                   recorder=recorder, cursor=cursor, deduplicator=deduplicator,
+                                                   truncated_listings=truncated_listings)
+            else:
+                workers = min(len(subreddit_names), max(1, getattr(cfg, 'SUBREDDIT_WORKERS', 4)))
+                # Fork match workers before any ingest threads exist
+                processes = getattr(cfg, 'MATCH_PROCESSES', 1)
+                match_pool = MatchWorkerPool(matcher, processes).start() if processes > 1 else None
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='subreddit') as executor:
+                    futures = {
+                        name: executor.submit(analyze_subreddit, None, matcher, name, start_date, end_date,
+                                              match_pool, recorder, cursor, deduplicator, truncated_listings)
+                        for name in subreddit_names
+                    }
+                    results = {name: future.result() for name, future in futures.items()}
+        finally:
+            if match_pool:
+                match_pool.close()
+            if recorder:
+                recorder.close()
+                print(f"Recorded {recorder.count} documents to {recorder.path}")
         
-        # Process posts
-        posts_start = datetime.now()
-        post_count = 0
-        for post in subreddit.new(limit=cfg.POST_LIMIT):
-            # Skip posts not from yesterday
-            if not (yesterday_start <= post.created_utc <= yesterday_end):
-                continue
-                
-            post_count += 1
-            # Process title and text
-            title = post.title.lower()
-            trends.update(keyword for keyword in keywords if keyword in title)
-            
-            if post.selftext:
-                text = post.selftext.lower()
-                trends.update(keyword for keyword in keywords if keyword in text)
-            
-            # Process comments
-            try:
-                post.comments.replace_more(limit=0)
-                comments = post.comments.list()[:cfg.INITIAL_COMMENT_FETCH]
-                top_comments = sorted(comments, 
-                                   key=lambda x: x.score if hasattr(x, 'score') else 0, 
-                                   reverse=True)[:cfg.TOP_COMMENTS_LIMIT]
-                
-                for comment in top_comments:
-                    if not hasattr(comment, 'created_utc') or not (yesterday_start <= comment.created_utc <= yesterday_end):
-                        continue
-                    comment_text = comment.body.lower() if hasattr(comment, 'body') else ""
-                    trends.update(keyword for keyword in keywords if keyword in comment_text)
-            except Exception as e:
-                print(f"Error processing comments for post {post.id}: {str(e)}")
-            
-            if post_count % 10 == 0:
-                print(f"Processed {post_count} posts at {datetime.now()}")
+        if cursor is not None:
+            cursor.prune(get_lookback_start(window_start))
+            save_comment_cursor(cursor)
         
-        print(f"Processing posts took: {datetime.now() - posts_start}")
+        trends = {day: {name: dict(daily_trends[day]) for name, (daily_trends, _, _) in results.items()}
+                  for day in new_daily_counters(start_date, end_date)}
+        weights = {day: {name: {keyword: tuple(daily_weights[day][metric][keyword] for metric in WEIGHT_METRICS)
+                                for keyword in trends[day][name]}
+                         for name, (_, _, daily_weights) in results.items()}
+                   for day in trends}
+        drop_unreached_days(trends, weights, truncated_listings)
+        post_count = sum(count for _, count, _ in results.values())
         
-        end = datetime.now()
-        print(f"Total Reddit analysis took: {end - start}")
-        print(f"Found {len(trends)} trending keywords from {post_count} posts")
-        return dict(trends), yesterday.date()
+        for name, (daily_trends, count, _) in results.items():
+            keywords = set().union(*daily_trends.values())
+            print(f"Found {len(keywords)} trending keywords from {count} posts in r/{name}")
+        print(f"Processed {post_count} posts across {len(results)} subreddits and {len(trends)} days")
+        if deduplicator is not None:
+            stats = deduplicator.stats()
+            print(f"Skipped {stats['exact_duplicates']} exact and {stats['near_duplicates']} near duplicates "
+                  f"of {stats['documents_checked']} documents checked")
+        return trends, weights
     except Exception as e:
         print(f"Reddit analysis error: {str(e)}")
         raise
 
-def save_to_snowflake(trends_data: Dict[str, int], snapshot_date: date) -> None:
+TREND_COLUMNS = ('TREND_ID', 'SNAPSHOT_TIME', 'SNAPSHOT_DATE', 'SUBREDDIT', 'KEYWORD', 'MENTION_COUNT',
+                 'POST_SCORE', 'COMMENT_SCORE', 'NUM_COMMENTS')
+
+# Weighted metric sums per keyword, in WEIGHT_METRICS order
+NO_WEIGHTS = (0,) * len(WEIGHT_METRICS)
+
+def build_trend_records(trends_data: Dict[date, Dict[str, Dict[str, int]]], snapshot_time: datetime,
+                        weights_data: Optional[Dict[date, Dict[str, Dict[str, Tuple[int, ...]]]]] = None
+                        ) -> List[Tuple[Any, ...]]:
+    """
+    Build REDDIT_TRENDS rows in TREND_COLUMNS order.
+
+    Args:
+        trends_data: Keyword mention counts per snapshot date and subreddit
+        snapshot_time: When the snapshot was taken
+        weights_data: WEIGHT_METRICS sums per snapshot date, subreddit and keyword; zeros where missing
+
+    Returns:
+        List[Tuple[Any, ...]]: One row per date, subreddit and keyword
     """
-    Save trends data to the Snowflake table.
+    weights_data = weights_data or {}
+    records = []
+    for snapshot_date, subreddits in trends_data.items():
+        for subreddit, counts in subreddits.items():
+            weights = weights_data.get(snapshot_date, {}).get(subreddit, {})
+            records.extend((str(uuid.uuid4()), snapshot_time, snapshot_date, subreddit, keyword, count,
+                            *weights.get(keyword, NO_WEIGHTS))
+                           for keyword, count in counts.items())
+    return records
+
+def write_records_csv(records: List[Tuple[Any, ...]], path: str) -> None:
+    """
+    Write rows to a gzip-compressed CSV file for staging.
 
     Args:
-        trends_data: Dictionary mapping keywords to their mention counts
-        snapshot_date: The date of the snapshot to save
+        records: Rows in TREND_COLUMNS order
+        path: Destination file path
+    """
+    with gzip.open(path, 'wt', encoding='utf-8', newline='', compresslevel=6) as f:
+        csv.writer(f).writerows(records)
+
+def bulk_load_records(cur: SnowflakeCursor, records: List[Tuple[Any, ...]], table: str = 'REDDIT_TRENDS') -> None:
+    """
+    Load rows by PUTting a compressed CSV to an internal stage and running COPY INTO.
+
+    Uses the user stage by default (BULK_LOAD_STAGE), which needs no extra grants.
+
+    Args:
+        cur: Open Snowflake cursor
+        records: Rows in TREND_COLUMNS order
+        table: Target table
+
+    Raises:
+        Error: If the PUT or COPY INTO fails
+    """
+    stage = getattr(cfg, 'BULK_LOAD_STAGE', '@~/reddit_trends')
+    file_name = f"reddit_trends_{uuid.uuid4().hex}.csv.gz"
+    path = os.path.join(tempfile.gettempdir(), file_name)
+    
+    try:
+        with span('snowflake_write_csv'):
+            write_records_csv(records, path)
+        
+        with span('snowflake_put'):
+            cur.execute(f"PUT 'file://{path}' {stage} AUTO_COMPRESS=FALSE SOURCE_COMPRESSION=GZIP OVERWRITE=TRUE")
+        
+        with span('snowflake_copy'):
+            cur.execute(f"""
+            COPY INTO {table} ({', '.join(TREND_COLUMNS)})
+            FROM {stage}
+            FILES = ('{file_name}')
+            FILE_FORMAT = (TYPE = CSV COMPRESSION = GZIP FIELD_OPTIONALLY_ENCLOSED_BY = '"'
+                           ESCAPE_UNENCLOSED_FIELD = NONE)
+            ON_ERROR = ABORT_STATEMENT
+            PURGE = TRUE
+            """)
+        print(f"Bulk loaded {len(records)} records into {table} via {stage}/{file_name}")
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+def insert_records(cur: SnowflakeCursor, records: List[Tuple[Any, ...]], table: str) -> None:
+    """
+    Insert rows with executemany, or with a staged COPY INTO above BULK_LOAD_THRESHOLD.
+
+    Args:
+        cur: Open Snowflake cursor
+        records: Rows in TREND_COLUMNS order
+        table: Target table
+    """
+    # Large batches go through a staged file; small ones aren't worth the PUT round trip
+    if len(records) >= getattr(cfg, 'BULK_LOAD_THRESHOLD', 5000):
+        bulk_load_records(cur, records, table)
+    else:
+        with span('snowflake_insert'):
+            cur.executemany(f"""
+            INSERT INTO {table} ({', '.join(TREND_COLUMNS)})
+            VALUES ({', '.join(['%s'] * len(TREND_COLUMNS))})
+            """, records)
+
+@span('snowflake_save')
+def save_to_snowflake(trends_data: Dict[date, Dict[str, Dict[str, int]]],
+                      weights_data: Optional[Dict[date, Dict[str, Dict[str, Tuple[int, ...]]]]] = None) -> None:
+    """
+    Upsert trends data into the Snowflake table.
+
+    Rows for every day are loaded into a session-scoped temporary table and
+    merged into REDDIT_TRENDS on (SNAPSHOT_DATE, SUBREDDIT, KEYWORD) in a single
+    MERGE, so re-running or backfilling days updates their counts instead of
+    skipping or duplicating them. In the same transaction, rows of the days and
+    subreddits being written whose keyword was not found this time, e.g. after
+    the keyword list changed, are deleted, so a re-run leaves exactly its own rows.
+
+    Args:
+        trends_data: Keyword mention counts per snapshot date and subreddit
+        weights_data: POST_SCORE, COMMENT_SCORE and NUM_COMMENTS sums per snapshot date, subreddit and keyword
 
     Raises:
         Error: If a Snowflake-specific error occurs during the operation
     """
-    start = datetime.now()
-    print(f"Starting Snowflake save at {start}")
+    snapshot_time = datetime.utcnow()
+    records = build_trend_records(trends_data, snapshot_time, weights_data)
+    dates = ', '.join(str(snapshot_date) for snapshot_date in sorted(trends_data))
+    # Every day and subreddit analyzed, including those without any mentions
+    scope = [(snapshot_date, subreddit) for snapshot_date, subreddits in trends_data.items() for subreddit in subreddits]
+    if not scope:
+        print(f"No trends to save for {dates}")
+        return
     
     conn = get_snowflake_connection()
     cur = conn.cursor()
     
     try:
-        # Check if we already have data for this date
-        check_start = datetime.now()
-        cur.execute("""
-        SELECT COUNT(*) 
-        FROM REDDIT_TRENDS 
-        WHERE SNAPSHOT_DATE = %s
-        """, (snapshot_date,))
-        count = cur.fetchone()[0]
+        # Stage the rows, and the days and subreddits they replace, in temporary tables
+        cur.execute("CREATE OR REPLACE TEMPORARY TABLE REDDIT_TRENDS_STAGE LIKE REDDIT_TRENDS")
+        if records:
+            insert_records(cur, records, 'REDDIT_TRENDS_STAGE')
+        cur.execute("CREATE OR REPLACE TEMPORARY TABLE REDDIT_TRENDS_SCOPE (SNAPSHOT_DATE DATE, SUBREDDIT STRING)")
+        cur.executemany("INSERT INTO REDDIT_TRENDS_SCOPE (SNAPSHOT_DATE, SUBREDDIT) VALUES (%s, %s)", scope)
         
-        if count > 0:
-            print(f"Data already exists for {snapshot_date}, skipping insertion")
-            return
-            
-        print(f"Data check took: {datetime.now() - check_start}")
+        # DDL commits implicitly, so the transaction starts once the staging tables exist
+        with span('snowflake_merge'):
+            cur.execute("BEGIN")
+            cur.execute("""
+            DELETE FROM REDDIT_TRENDS t
+            USING REDDIT_TRENDS_SCOPE r
+            WHERE t.SNAPSHOT_DATE = r.SNAPSHOT_DATE
+              AND t.SUBREDDIT = r.SUBREDDIT
+              AND NOT EXISTS (SELECT 1 FROM REDDIT_TRENDS_STAGE s
+                              WHERE s.SNAPSHOT_DATE = t.SNAPSHOT_DATE
+                                AND s.SUBREDDIT = t.SUBREDDIT
+                                AND s.KEYWORD = t.KEYWORD)
+            """)
+            deleted = cur.rowcount
+            # Merge the rows in one statement keyed on the natural key
+            cur.execute("""
+            MERGE INTO REDDIT_TRENDS t
+            USING REDDIT_TRENDS_STAGE s
+            ON t.SNAPSHOT_DATE = s.SNAPSHOT_DATE
+               AND t.SUBREDDIT = s.SUBREDDIT
+               AND t.KEYWORD = s.KEYWORD
+            WHEN MATCHED THEN UPDATE SET
+                t.SNAPSHOT_TIME = s.SNAPSHOT_TIME,
+                t.MENTION_COUNT = s.MENTION_COUNT,
+                t.POST_SCORE = s.POST_SCORE,
+                t.COMMENT_SCORE = s.COMMENT_SCORE,
+                t.NUM_COMMENTS = s.NUM_COMMENTS
+            WHEN NOT MATCHED THEN INSERT (TREND_ID, SNAPSHOT_TIME, SNAPSHOT_DATE, SUBREDDIT, KEYWORD, MENTION_COUNT,
+                                          POST_SCORE, COMMENT_SCORE, NUM_COMMENTS)
+            VALUES (s.TREND_ID, s.SNAPSHOT_TIME, s.SNAPSHOT_DATE, s.SUBREDDIT, s.KEYWORD, s.MENTION_COUNT,
+                    s.POST_SCORE, s.COMMENT_SCORE, s.NUM_COMMENTS)
+            """)
+            inserted, updated = cur.fetchone()[:2]
+            conn.commit()
+        print(f"Merged {len(records)} records for {dates}: {inserted} inserted, {updated} updated, "
+              f"{deleted} stale deleted")
         
-        # Prepare and insert data
-        insert_start = datetime.now()
-        snapshot_time = datetime.utcnow()
-        records = [(str(uuid.uuid4()), snapshot_time, snapshot_date, keyword, count) 
-                  for keyword, count in trends_data.items()]
+    except Exception as e:
+        print(f"Snowflake save error: {str(e)}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        # Don't hand a connection in an unknown state to the next invocation
+        RESOURCES.discard('Snowflake connection')
+        raise
+    finally:
+        cur.close()
+
+@span('snapshot_write')
+def save_snapshot_files(trends_data: Dict[date, Dict[str, Dict[str, int]]]) -> None:
+    """
+    Write each day's counts as a compact snapshot file under SNAPSHOT_PREFIX in the S3 bucket.
+
+    Files are date-partitioned (<prefix>/date=YYYY-MM-DD/trends.rts) and
+    overwritten when a day is re-run; snapshot_store reads a local copy of the
+    prefix without touching Snowflake.
+
+    Args:
+        trends_data: Keyword mention counts per snapshot date and subreddit
+
+    Raises:
+        Exception: If a file cannot be encoded or uploaded
+    """
+    s3 = get_boto3_client('s3')
+    try:
+        for snapshot_date, trends in sorted(trends_data.items()):
+            key = snapshot_key(cfg.SNAPSHOT_PREFIX, snapshot_date)
+            body = encode_snapshot(trends)
+            s3.put_object(Bucket=cfg.BUCKET_NAME, Key=key, Body=body, ContentType='application/octet-stream')
+            print(f"Wrote {len(body)} byte snapshot to s3://{cfg.BUCKET_NAME}/{key}")
+    except Exception as e:
+        print(f"Snapshot file error: {str(e)}")
+        raise
+
+def load_trend_state() -> TrendState:
+    """
+    Load the trend state from TREND_STATE_KEY in the S3 bucket.
+
+    Returns:
+        TrendState: The stored state, or an empty one on the first run
+    """
+    alpha = getattr(cfg, 'TREND_EWMA_ALPHA', 0.1)
+    try:
+        with span('trend_state_load'):
+            obj = get_boto3_client('s3').get_object(Bucket=cfg.BUCKET_NAME, Key=cfg.TREND_STATE_KEY)
+            state = TrendState.from_json(obj['Body'].read(), alpha)
+        print(f"Loaded trend state through {state.last_date}")
+        return state
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'NoSuchKey':
+            raise
+        print(f"No trend state at s3://{cfg.BUCKET_NAME}/{cfg.TREND_STATE_KEY}, starting a new one")
+        return TrendState(alpha)
+
+def save_trend_state(state: TrendState) -> None:
+    """
+    Store the trend state at TREND_STATE_KEY in the S3 bucket.
+
+    Args:
+        state: State to store
+    """
+    with span('trend_state_save'):
+        get_boto3_client('s3').put_object(Bucket=cfg.BUCKET_NAME, Key=cfg.TREND_STATE_KEY,
+                                          Body=state.to_json().encode('utf-8'),
+                                          ContentType='application/json')
+
+@span('trend_detection')
+def detect_trending_keywords(trends_data: Dict[date, Dict[str, Dict[str, int]]]) -> List[Dict[str, Any]]:
+    """
+    Update the rolling per-keyword averages with a run's counts and rank the spiking keywords.
+
+    The EWMA state in S3 is advanced by each new day once, so trends are
+    detected from the counts being saved without rescanning REDDIT_TRENDS.
+
+    Args:
+        trends_data: Keyword mention counts per snapshot date and subreddit
+
+    Returns:
+        List[Dict[str, Any]]: Up to TREND_TOP_N spiking keywords, highest z-score first
+    """
+    state = load_trend_state()
+    spikes = detect_spikes(state, trends_data,
+                           getattr(cfg, 'TREND_Z_THRESHOLD', 3.0),
+                           getattr(cfg, 'TREND_MIN_MENTIONS', 5),
+                           getattr(cfg, 'TREND_WARMUP_DAYS', 7),
+                           getattr(cfg, 'TREND_TOP_N', 20))
+    save_trend_state(state)
+    for spike in spikes:
+        print(f"Spiking in r/{spike['subreddit']} on {spike['date']}: {spike['keyword']} "
+              f"({spike['mention_count']} mentions, mean {spike['mean']}, z {spike['z_score']})")
+    return spikes
+
+HOURLY_TREND_COLUMNS = ('HOUR_START', 'SUBREDDIT', 'KEYWORD', 'MENTION_COUNT', 'UPDATED_AT')
+
+@span('snowflake_save_hourly')
+def save_hourly_trends(hourly_trends: Dict[Tuple[datetime, str], Dict[str, int]],
+                       stream_cursor: Optional[Dict[str, str]] = None) -> None:
+    """
+    Add streamed keyword mentions to the hourly Snowflake table.
+
+    Each flush of the stream ingester carries only the mentions seen since the
+    previous one, so counts are added to existing REDDIT_TRENDS_HOURLY rows on
+    (HOUR_START, SUBREDDIT, KEYWORD) rather than replacing them. The stream
+    cursor past the items counted is saved to REDDIT_STREAM_CURSOR in the same
+    transaction, so a flush that fails or is retried can neither lose counts
+    nor add them twice.
+
+    Args:
+        hourly_trends: Keyword mention counts per hour start and subreddit
+        stream_cursor: Newest id counted per stream kind
+
+    Raises:
+        Error: If a Snowflake-specific error occurs during the operation
+    """
+    updated_at = datetime.utcnow()
+    records = [(hour, subreddit, keyword, count, updated_at)
+               for (hour, subreddit), counts in hourly_trends.items()
+               for keyword, count in counts.items()]
+    cursor_rows = [(kind, last_id, updated_at) for kind, last_id in sorted((stream_cursor or {}).items())]
+    if not records and not cursor_rows:
+        return
+    conn = get_snowflake_connection()
+    cur = conn.cursor()
+    
+    try:
+        if records:
+            cur.execute("CREATE OR REPLACE TEMPORARY TABLE REDDIT_TRENDS_HOURLY_STAGE LIKE REDDIT_TRENDS_HOURLY")
+            with span('snowflake_insert'):
+                cur.executemany(f"""
+                INSERT INTO REDDIT_TRENDS_HOURLY_STAGE ({', '.join(HOURLY_TREND_COLUMNS)})
+                VALUES ({', '.join(['%s'] * len(HOURLY_TREND_COLUMNS))})
+                """, records)
         
-        cur.executemany("""
-        INSERT INTO REDDIT_TRENDS (TREND_ID, SNAPSHOT_TIME, SNAPSHOT_DATE, KEYWORD, MENTION_COUNT)
-        VALUES (%s, %s, %s, %s, %s)
-        """, records)
+        # DDL commits implicitly, so the transaction starts once the staging table exists
+        with span('snowflake_merge'):
+            cur.execute("BEGIN")
+            inserted = updated = 0
+            if records:
+                cur.execute("""
+                MERGE INTO REDDIT_TRENDS_HOURLY t
+                USING REDDIT_TRENDS_HOURLY_STAGE s
+                ON t.HOUR_START = s.HOUR_START
+                   AND t.SUBREDDIT = s.SUBREDDIT
+                   AND t.KEYWORD = s.KEYWORD
+                WHEN MATCHED THEN UPDATE SET
+                    t.MENTION_COUNT = t.MENTION_COUNT + s.MENTION_COUNT,
+                    t.UPDATED_AT = s.UPDATED_AT
+                WHEN NOT MATCHED THEN INSERT (HOUR_START, SUBREDDIT, KEYWORD, MENTION_COUNT, UPDATED_AT)
+                VALUES (s.HOUR_START, s.SUBREDDIT, s.KEYWORD, s.MENTION_COUNT, s.UPDATED_AT)
+                """)
+                inserted, updated = cur.fetchone()[:2]
+            if cursor_rows:
+                cur.execute(f"""
+                MERGE INTO REDDIT_STREAM_CURSOR t
+                USING (SELECT column1 AS STREAM_KIND, column2 AS LAST_ID, column3 AS UPDATED_AT
+                       FROM VALUES {', '.join(['(%s, %s, %s)'] * len(cursor_rows))}) s
+                ON t.STREAM_KIND = s.STREAM_KIND
+                WHEN MATCHED THEN UPDATE SET
+                    t.LAST_ID = s.LAST_ID,
+                    t.UPDATED_AT = s.UPDATED_AT
+                WHEN NOT MATCHED THEN INSERT (STREAM_KIND, LAST_ID, UPDATED_AT)
+                VALUES (s.STREAM_KIND, s.LAST_ID, s.UPDATED_AT)
+                """, [value for row in cursor_rows for value in row])
+            conn.commit()
+        print(f"Merged {len(records)} hourly records: {inserted} inserted, {updated} updated, "
+              f"stream cursor at {dict(row[:2] for row in cursor_rows)}")
         
-        conn.commit()
-        print(f"Data insertion took: {datetime.now() - insert_start}")
+    except Exception as e:
+        print(f"Snowflake hourly save error: {str(e)}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        RESOURCES.discard('Snowflake connection')
+        raise
+    finally:
+        cur.close()
+
+def load_stream_cursor_ids() -> Dict[str, str]:
+    """
+    Read the stream cursor committed with the hourly counts.
+
+    Returns:
+        Dict[str, str]: Newest id counted per stream kind, empty before the first flush
+
+    Raises:
+        Error: If a Snowflake-specific error occurs during the operation
+    """
+    conn = get_snowflake_connection()
+    cur = conn.cursor()
+    
+    try:
+        cur.execute("SELECT STREAM_KIND, LAST_ID FROM REDDIT_STREAM_CURSOR")
+        return {kind: last_id for kind, last_id in cur.fetchall()}
+    except Exception as e:
+        print(f"Snowflake stream cursor load error: {str(e)}")
+        RESOURCES.discard('Snowflake connection')
+        raise
+    finally:
+        cur.close()
+
+@span('snowflake_rollup')
+def rollup_hourly_trends(start_date: date, end_date: date) -> None:
+    """
+    Build the daily snapshots of a date range from the streamed hourly rows.
+
+    Sums REDDIT_TRENDS_HOURLY per UTC day and merges the totals into
+    REDDIT_TRENDS on (SNAPSHOT_DATE, SUBREDDIT, KEYWORD) like save_to_snowflake,
+    so rolling a day up again refreshes it with any late-flushed hours. The
+    stream only counts mentions, so the weighted metric columns of rows a
+    crawl saved earlier are cleared, and in the same transaction rows of the
+    days and subreddits with streamed counts whose keyword was not streamed
+    are deleted. Days and subreddits without any hourly rows are left alone.
+
+    Args:
+        start_date: First day to roll up
+        end_date: Last day to roll up, inclusive
+
+    Raises:
+        Error: If a Snowflake-specific error occurs during the operation
+    """
+    window_start, window_end = get_date_window(start_date, end_date)
+    snapshot_time = datetime.utcnow()
+    conn = get_snowflake_connection()
+    cur = conn.cursor()
+    
+    try:
+        cur.execute("""
+        CREATE OR REPLACE TEMPORARY TABLE REDDIT_TRENDS_ROLLUP AS
+        SELECT TO_DATE(HOUR_START) AS SNAPSHOT_DATE, SUBREDDIT, KEYWORD, SUM(MENTION_COUNT) AS MENTION_COUNT
+        FROM REDDIT_TRENDS_HOURLY
+        WHERE HOUR_START >= %s AND HOUR_START < %s
+        GROUP BY 1, 2, 3
+        """, (datetime.utcfromtimestamp(window_start), datetime.utcfromtimestamp(window_end)))
         
-        end = datetime.now()
-        print(f"Total Snowflake save took: {end - start}")
-        print(f"Inserted {len(records)} records for {snapshot_date}")
+        # DDL commits implicitly, so the transaction starts once the rollup table exists
+        with span('snowflake_merge'):
+            cur.execute("BEGIN")
+            cur.execute("""
+            DELETE FROM REDDIT_TRENDS t
+            WHERE EXISTS (SELECT 1 FROM REDDIT_TRENDS_ROLLUP r
+                          WHERE r.SNAPSHOT_DATE = t.SNAPSHOT_DATE
+                            AND r.SUBREDDIT = t.SUBREDDIT)
+              AND NOT EXISTS (SELECT 1 FROM REDDIT_TRENDS_ROLLUP s
+                              WHERE s.SNAPSHOT_DATE = t.SNAPSHOT_DATE
+                                AND s.SUBREDDIT = t.SUBREDDIT
+                                AND s.KEYWORD = t.KEYWORD)
+            """)
+            deleted = cur.rowcount
+            cur.execute("""
+            MERGE INTO REDDIT_TRENDS t
+            USING REDDIT_TRENDS_ROLLUP s
+            ON t.SNAPSHOT_DATE = s.SNAPSHOT_DATE
+               AND t.SUBREDDIT = s.SUBREDDIT
+               AND t.KEYWORD = s.KEYWORD
+            WHEN MATCHED THEN UPDATE SET
+                t.SNAPSHOT_TIME = %s,
+                t.MENTION_COUNT = s.MENTION_COUNT,
+                t.POST_SCORE = NULL,
+                t.COMMENT_SCORE = NULL,
+                t.NUM_COMMENTS = NULL
+            WHEN NOT MATCHED THEN INSERT (TREND_ID, SNAPSHOT_TIME, SNAPSHOT_DATE, SUBREDDIT, KEYWORD, MENTION_COUNT)
+            VALUES (UUID_STRING(), %s, s.SNAPSHOT_DATE, s.SUBREDDIT, s.KEYWORD, s.MENTION_COUNT)
+            """, (snapshot_time, snapshot_time))
+            inserted, updated = cur.fetchone()[:2]
+            conn.commit()
+        print(f"Rolled up hourly trends for {start_date} to {end_date}: {inserted} inserted, {updated} updated, "
+              f"{deleted} stale deleted")
         
     except Exception as e:
-        print(f"Snowflake save error: {str(e)}")
+        print(f"Snowflake rollup error: {str(e)}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        RESOURCES.discard('Snowflake connection')
         raise
     finally:
         cur.close()
-        conn.close()
 
-def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, str]:
+def parse_backfill_range(event: Dict[str, Any]) -> Optional[Tuple[date, date]]:
+    """
+    Read an optional backfill date range from the Lambda event.
+
+    Expects {"backfill": {"start_date": "YYYY-MM-DD", "end_date": "YYYY-MM-DD"}},
+    where end_date defaults to start_date.
+
+    Args:
+        event: Event data passed to the Lambda function
+
+    Returns:
+        Optional[Tuple[date, date]]: First and last day to backfill, or None for a daily run
+
+    Raises:
+        ValueError: If the range is malformed, reaches today or exceeds MAX_BACKFILL_DAYS
+    """
+    backfill = (event or {}).get('backfill')
+    if not backfill:
+        return None
+    
+    start_date = date.fromisoformat(backfill['start_date'])
+    end_date = date.fromisoformat(backfill.get('end_date', backfill['start_date']))
+    max_days = getattr(cfg, 'MAX_BACKFILL_DAYS', 31)
+    if end_date < start_date:
+        raise ValueError(f"Backfill end_date {end_date} is before start_date {start_date}")
+    if end_date >= datetime.utcnow().date():
+        raise ValueError(f"Backfill end_date {end_date} must be before today, the day is still in progress")
+    if (end_date - start_date).days + 1 > max_days:
+        raise ValueError(f"Backfill range {start_date} to {end_date} exceeds MAX_BACKFILL_DAYS ({max_days})")
+    return start_date, end_date
+
+def run_stream(context: Any) -> Dict[str, Any]:
+    """
+    Run the stream ingester for this invocation's time budget.
+
+    Args:
+        context: Runtime information provided by AWS Lambda
+
+    Returns:
+        Dict[str, Any]: Response describing what was streamed
+    """
+    from stream_ingest import run_stream_ingest
+    
+    run_seconds = getattr(cfg, 'STREAM_RUN_SECONDS', 240)
+    remaining = getattr(context, 'get_remaining_time_in_millis', None)
+    if remaining:
+        # Leave time for the last flush to Snowflake
+        run_seconds = min(run_seconds, remaining() / 1000 - getattr(cfg, 'STREAM_FLUSH_RESERVE_SECONDS', 30))
+    summary = run_stream_ingest(max(0, run_seconds))
+    return {
+        'statusCode': '200',
+        'body': json.dumps('Successfully streamed Reddit trends'),
+        'subreddits_processed': get_subreddit_names(),
+        **summary
+    }
+
+# Invocations served by this execution environment, 0 until the first (cold) one
+_INVOCATIONS = 0
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     AWS Lambda handler for processing Reddit trends.
 
+    Processes yesterday by default, or the date range of a backfill event.
+    With DAILY_SNAPSHOT_SOURCE set to 'hourly' the days are rolled up from the
+    streamed hourly rows instead of crawled; a {"stream": true} event runs the
+    stream ingester that produces those rows. Stage timings are logged as one
+    CloudWatch Embedded Metric Format record per invocation and returned in the
+    response. The first invocation of an execution environment is flagged as a
+    cold start and also reports the module initialization time; dependencies
+    imported on first use show up as 'import_<package>' spans.
+
     Args:
         event: Event data passed to the Lambda function
         context: Runtime information provided by AWS Lambda
 
     Returns:
-        Dict[str, str]: Response containing execution status and details
+        Dict[str, Any]: Response containing execution status, details and stage timings
     """
-    overall_start = datetime.now()
-    print(f"Starting Lambda execution at {overall_start}")
+    global _INVOCATIONS
+    cold_start = _INVOCATIONS == 0
+    _INVOCATIONS += 1
+    TIMINGS.reset()
+    if cold_start:
+        TIMINGS.add('module_init', _INIT_SECONDS)
+    with span('lambda_total') as invocation:
+        try:
+            # Main execution
+            if (event or {}).get('stream'):
+                response = run_stream(context)
+            else:
+                backfill_range = parse_backfill_range(event)
+                if backfill_range:
+                    print(f"Backfilling {backfill_range[0]} to {backfill_range[1]}")
+                spikes = None
+                deduplicator = None
+                if getattr(cfg, 'DAILY_SNAPSHOT_SOURCE', 'crawl') == 'hourly':
+                    start_date, end_date = backfill_range or ((datetime.utcnow() - timedelta(days=1)).date(),) * 2
+                    rollup_hourly_trends(start_date, end_date)
+                    dates_processed = [str(day) for day in new_daily_counters(start_date, end_date)]
+                else:
+                    deduplicator = get_deduplicator()
+                    trends, weights = analyze_reddit_trends(*(backfill_range or (None, None)), deduplicator)
+                    save_to_snowflake(trends, weights)
+                    if getattr(cfg, 'SNAPSHOT_PREFIX', None):
+                        save_snapshot_files(trends)
+                    if getattr(cfg, 'TREND_STATE_KEY', None):
+                        spikes = detect_trending_keywords(trends)
+                    dates_processed = [str(snapshot_date) for snapshot_date in sorted(trends)]
+                
+                response = {
+                    'statusCode': '200',
+                    'body': json.dumps('Successfully processed and saved Reddit trends'),
+                    'date_processed': dates_processed[-1] if dates_processed else None,
+                    'dates_processed': dates_processed,
+                    'subreddits_processed': get_subreddit_names()
+                }
+                if spikes is not None:
+                    response['trending_keywords'] = spikes
+                if deduplicator is not None:
+                    response['duplicates_skipped'] = deduplicator.stats()
+        except Exception as e:
+            print(f"Lambda execution error: {str(e)}")
+            response = {
+                'statusCode': '500',
+                'body': json.dumps(f"Error: {str(e)}")
+            }
     
+    timings = TIMINGS.snapshot()
+    function_name = getattr(context, 'function_name', None) or os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local')
     try:
-        # Main execution
-        trends, snapshot_date = analyze_reddit_trends()
-        save_to_snowflake(trends, snapshot_date)
-        
-        overall_end = datetime.now()
-        print(f"Total Lambda execution took: {overall_end - overall_start}")
-        
-        return {
-            'statusCode': '200',
-            'body': json.dumps('Successfully processed and saved Reddit trends'),
-            'executionTime': str(overall_end - overall_start),
-            'date_processed': str(snapshot_date)
-        }
-    except Exception as e:
-        print(f"Lambda execution error: {str(e)}")
-        return {
-            'statusCode': '500',
-            'body': json.dumps(f"Error: {str(e)}")
-        }
+        namespace = getattr(cfg, 'METRICS_NAMESPACE', 'RedditTrendTracker')
+    except ImportError:
+        # Missing config.py, already reported in the response
+        namespace = 'RedditTrendTracker'
+    print(emf_record(timings, namespace, {'FunctionName': function_name},
+                     {'statusCode': response['statusCode'], 'coldStart': cold_start,
+                      'dates_processed': response.get('dates_processed'),
+                      'hours_flushed': response.get('hours_flushed')}))
+    response['coldStart'] = cold_start
+    if cold_start:
+        response['initTime'] = str(timedelta(seconds=_INIT_SECONDS))
+    response['executionTime'] = str(timedelta(seconds=invocation.elapsed))
+    response['timings'] = timings
+    return response
+
+# Module initialization time, up to here; lazily imported dependencies are timed on first use
+_INIT_SECONDS = time.perf_counter() - _INIT_START
 
 if __name__ == "__main__":
     lambda_handler({}, {})
@@ -0,0 +1,201 @@
+import multiprocessing
+import queue
+import time
+from collections import deque
+from datetime import date
+from itertools import islice
+from multiprocessing.connection import Connection
+from typing import Any, Deque, Iterable, Iterator, List, Optional, Tuple
+
+from pipeline import Document, TrendAggregator, match_documents
+from timing import TIMINGS
+
+Batch = Tuple[date, date, List[Document]]
+
+
+def _match_worker(conn: Connection, matcher: Any) -> None:
+    # Runs in the child: the matcher is inherited through fork, only batches cross the pipe.
+    # Matching time is measured here and reported back, since spans in the child are lost.
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        start_date, end_date, documents = message
+        try:
+            aggregator = TrendAggregator(start_date, end_date)
+            start = time.perf_counter()
+            for document in documents:
+                aggregator.add(document, matcher.find(document.text))
+            conn.send(({day: trends for day, trends in aggregator.daily_trends.items() if trends},
+                       aggregator.document_counts,
+                       {day: weights for day, weights in aggregator.daily_weights.items()
+                        if aggregator.daily_trends[day]},
+                       time.perf_counter() - start))
+        except Exception as e:
+            conn.send(e)
+
+
+class MatchWorkerPool:
+    """
+    Worker processes that match batches of normalized documents against a prebuilt matcher.
+
+    Each worker returns partial per-day Counters for a batch, so only document
+    text goes to the workers and only counts come back. Workers are plain
+    Processes talking over Pipes: Lambda has no /dev/shm, which rules out
+    multiprocessing.Pool, Queue and ProcessPoolExecutor. A pool can be shared
+    by threads; each stream checks workers out while its batches are in flight.
+    """
+
+    def __init__(self, matcher: Any, processes: int):
+        """
+        Args:
+            matcher: Compiled keyword matcher, inherited by the workers
+            processes: Number of worker processes
+        """
+        self.matcher = matcher
+        self.processes = max(1, processes)
+        self._workers: List[Tuple[multiprocessing.Process, Connection]] = []
+        self._idle: queue.Queue = queue.Queue()
+
+    def start(self) -> 'MatchWorkerPool':
+        """
+        Fork the worker processes.
+
+        Returns:
+            MatchWorkerPool: self, for chaining
+        """
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        for n in range(self.processes):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_match_worker, args=(child_conn, self.matcher),
+                                      name=f"match-{n}", daemon=True)
+            process.start()
+            child_conn.close()
+            self._workers.append((process, parent_conn))
+            self._idle.put(parent_conn)
+        return self
+
+    def close(self) -> None:
+        """
+        Stop the worker processes.
+        """
+        for process, conn in self._workers:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            conn.close()
+        for process, _ in self._workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._workers = []
+
+    def __enter__(self) -> 'MatchWorkerPool':
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def map(self, batches: Iterable[Batch]) -> Iterator[Tuple[dict, Any, dict, float]]:
+        """
+        Match batches on the workers, keeping every worker this stream can check out busy.
+
+        Args:
+            batches: (start_date, end_date, documents) to match and count
+
+        Yields:
+            Tuple[dict, Any, dict, float]: Per-day Counters, document counts, per-day weighted
+            metric Counters and matching seconds for each batch, in order
+        """
+        in_flight: Deque[Connection] = deque()
+
+        def collect() -> Tuple[dict, Any, dict, float]:
+            conn = in_flight.popleft()
+            try:
+                result = conn.recv()
+            finally:
+                self._idle.put(conn)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        try:
+            for batch in batches:
+                while True:
+                    try:
+                        conn = self._idle.get(block=not in_flight)
+                        break
+                    except queue.Empty:
+                        # Every worker is busy: our own oldest batch frees one
+                        yield collect()
+                conn.send(batch)
+                in_flight.append(conn)
+            while in_flight:
+                yield collect()
+        finally:
+            # Stream abandoned: drain replies so the workers go back to the pool clean
+            while in_flight:
+                conn = in_flight.popleft()
+                try:
+                    conn.recv()
+                except (EOFError, OSError):
+                    pass
+                self._idle.put(conn)
+
+
+def _batched(documents: Iterator[Document], size: int) -> Iterator[List[Document]]:
+    while True:
+        batch = list(islice(documents, size))
+        if not batch:
+            return
+        yield batch
+
+
+def aggregate_documents(documents: Iterable[Document], matcher: Any, start_date: date, end_date: date,
+                        pool: Optional[MatchWorkerPool] = None, min_documents: int = 20000,
+                        batch_size: int = 2000) -> TrendAggregator:
+    """
+    Matcher and aggregator stages, spread over a worker pool for large streams.
+
+    The first min_documents documents are buffered; a stream that ends before
+    reaching the crossover is matched in-process, since shipping it to workers
+    would cost more than matching it. Larger streams go to the pool in batches
+    and the partial Counters are merged as they come back.
+
+    Args:
+        documents: Normalized documents
+        matcher: Compiled keyword matcher
+        start_date: First day counted
+        end_date: Last day counted, inclusive
+        pool: Started worker pool, or None to always match in-process
+        min_documents: Crossover below which matching stays in-process
+        batch_size: Documents per batch sent to a worker
+
+    Returns:
+        TrendAggregator: Counts for the whole stream
+    """
+    aggregator = TrendAggregator(start_date, end_date)
+    if pool is None:
+        return aggregator.consume(match_documents(documents, matcher))
+
+    documents = iter(documents)
+    head = list(islice(documents, min_documents))
+    if len(head) < min_documents:
+        return aggregator.consume(match_documents(head, matcher))
+
+    def batches() -> Iterator[Batch]:
+        for batch in _batched(iter(head), batch_size):
+            yield start_date, end_date, batch
+        head.clear()
+        for batch in _batched(documents, batch_size):
+            yield start_date, end_date, batch
+
+    for daily_trends, document_counts, daily_weights, seconds in pool.map(batches()):
+        aggregator.merge(daily_trends, document_counts, daily_weights)
+        TIMINGS.add('matching', seconds, sum(document_counts.values()))
+    return aggregator
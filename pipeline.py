@@ -0,0 +1,249 @@
+import queue
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional, Set, Tuple
+
+from timing import span
+
+
+class Document(NamedTuple):
+    """
+    A piece of Reddit text flowing through the pipeline.
+    """
+    kind: str            # 'title', 'selftext' or 'comment'
+    id: str              # Post or comment id
+    subreddit: str
+    created_utc: float
+    text: str
+    score: int = 0       # Post score for titles and selftexts, comment score for comments
+    num_comments: int = 0  # Post's comment count, 0 for comments
+
+
+# Weighted metrics summed per keyword alongside the plain mention count
+WEIGHT_METRICS = ('post_score', 'comment_score', 'num_comments')
+
+
+def new_daily_counters(start_date: date, end_date: date) -> Dict[date, Counter]:
+    """
+    Create one empty Counter per day in the range, inclusive.
+
+    Args:
+        start_date: First day
+        end_date: Last day
+
+    Returns:
+        Dict[date, Counter]: Empty Counter keyed by each day
+    """
+    return {start_date + timedelta(days=n): Counter() for n in range((end_date - start_date).days + 1)}
+
+
+def utc_day(created_utc: float) -> date:
+    """
+    Find the UTC day an item was created on.
+
+    Args:
+        created_utc: Creation time as a UTC timestamp
+
+    Returns:
+        date: The UTC day
+    """
+    return datetime.fromtimestamp(created_utc, timezone.utc).date()
+
+
+def day_counter(daily_trends: Dict[date, Counter], created_utc: float) -> Optional[Counter]:
+    """
+    Find the Counter for the UTC day an item was created on.
+
+    Args:
+        daily_trends: Counters keyed by day
+        created_utc: Creation time as a UTC timestamp
+
+    Returns:
+        Optional[Counter]: The day's Counter, or None if the day is outside the range
+    """
+    return daily_trends.get(utc_day(created_utc))
+
+
+def prefetch(iterable: Iterable[Any], maxsize: int) -> Iterator[Any]:
+    """
+    Run an iterable in a background thread, buffering at most maxsize items.
+
+    Lets network-bound producers run ahead of CPU-bound consumers while keeping
+    memory bounded. Exceptions raised by the producer are re-raised to the consumer.
+
+    Args:
+        iterable: Producer stage, e.g. a document source
+        maxsize: Queue bound between producer and consumer
+
+    Yields:
+        Any: Items of the iterable, in order
+    """
+    done = object()
+    buffer: queue.Queue = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+    failure: list = []
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                while not stop.is_set():
+                    try:
+                        buffer.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            close = getattr(iterable, 'close', None)
+            if close:
+                close()
+            buffer.put(done)
+
+    producer = threading.Thread(target=produce, name='prefetch', daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                break
+            yield item
+        if failure:
+            raise failure[0]
+    finally:
+        # Consumer stopped early: unblock and retire the producer
+        stop.set()
+        while producer.is_alive():
+            try:
+                buffer.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def normalize_document(document: Document) -> Document:
+    """
+    Lowercase a document's text for matching.
+
+    Args:
+        document: Raw document
+
+    Returns:
+        Document: Document with normalized text
+    """
+    return document._replace(text=document.text.lower())
+
+
+def normalize_documents(documents: Iterable[Document]) -> Iterator[Document]:
+    """
+    Normalizer stage.
+
+    Args:
+        documents: Raw documents
+
+    Yields:
+        Document: Documents with normalized text
+    """
+    for document in documents:
+        yield normalize_document(document)
+
+
+def match_documents(documents: Iterable[Document], matcher: Any) -> Iterator[Tuple[Document, Set[str]]]:
+    """
+    Matcher stage. Time spent in the matcher is recorded under the 'matching' span.
+
+    Args:
+        documents: Normalized documents
+        matcher: Compiled keyword matcher
+
+    Yields:
+        Tuple[Document, Set[str]]: Each document with the keywords found in it
+    """
+    for document in documents:
+        with span('matching'):
+            hits = matcher.find(document.text)
+        yield document, hits
+
+
+class TrendAggregator:
+    """
+    Aggregator stage: accumulates keyword hits into per-day Counters.
+
+    Alongside the mention counts it sums the score and comment count of the
+    posts, and the score of the comments, that mention each keyword, from the
+    fields praw already returned with the listing and the comment tree.
+    """
+
+    def __init__(self, start_date: date, end_date: date):
+        """
+        Args:
+            start_date: First day counted
+            end_date: Last day counted, inclusive
+        """
+        self.daily_trends: Dict[date, Counter] = new_daily_counters(start_date, end_date)
+        self.daily_weights: Dict[date, Dict[str, Counter]] = {
+            day: {metric: Counter() for metric in WEIGHT_METRICS} for day in self.daily_trends
+        }
+        self.document_counts: Counter = Counter()
+
+    def add(self, document: Document, hits: Set[str]) -> None:
+        """
+        Count a document's keyword hits on the day it was created.
+
+        Args:
+            document: Matched document
+            hits: Keywords found in the document
+        """
+        day = utc_day(document.created_utc)
+        trends = self.daily_trends.get(day)
+        if trends is None:
+            return
+        self.document_counts[document.kind] += 1
+        if not hits:
+            return
+        trends.update(hits)
+        weights = self.daily_weights[day]
+        if document.kind == 'comment':
+            comment_score = weights['comment_score']
+            for keyword in hits:
+                comment_score[keyword] += document.score
+        else:
+            post_score, num_comments = weights['post_score'], weights['num_comments']
+            for keyword in hits:
+                post_score[keyword] += document.score
+                num_comments[keyword] += document.num_comments
+
+    def merge(self, daily_trends: Dict[date, Counter], document_counts: Counter,
+              daily_weights: Optional[Dict[date, Dict[str, Counter]]] = None) -> None:
+        """
+        Fold in partial counts produced by another aggregator, e.g. a match worker.
+
+        Args:
+            daily_trends: Partial Counters keyed by day
+            document_counts: Partial documents counted by kind
+            daily_weights: Partial weighted metric Counters keyed by day
+        """
+        for day, trends in daily_trends.items():
+            if day in self.daily_trends:
+                self.daily_trends[day].update(trends)
+        for day, weights in (daily_weights or {}).items():
+            if day in self.daily_weights:
+                for metric, counter in weights.items():
+                    self.daily_weights[day][metric].update(counter)
+        self.document_counts.update(document_counts)
+
+    def consume(self, matches: Iterable[Tuple[Document, Set[str]]]) -> 'TrendAggregator':
+        """
+        Drain a matcher stage into the aggregator.
+
+        Args:
+            matches: Documents with their keyword hits
+
+        Returns:
+            TrendAggregator: self, for chaining
+        """
+        for document, hits in matches:
+            self.add(document, hits)
+        return self
@@ -0,0 +1,109 @@
+import gzip
+import json
+import threading
+from datetime import date
+from typing import Any, Iterable, Iterator, Optional
+
+from pipeline import Document, day_counter, new_daily_counters
+
+
+class FixtureRecorder:
+    """
+    Records the documents seen during a run to a gzip-compressed JSONL fixture.
+
+    One JSON object per line with the Document fields, raw text included, so a
+    replay feeds the pipeline exactly what the live run saw. Safe to share
+    between subreddit threads.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Fixture file to create, e.g. /tmp/reddit_fixture.jsonl.gz
+        """
+        self.path = path
+        self.count = 0
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, document: Document) -> None:
+        """
+        Append a document to the fixture.
+
+        Args:
+            document: Document as produced by a source stage
+        """
+        line = json.dumps(document._asdict(), ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + '\n')
+            self.count += 1
+
+    def record(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """
+        Recording stage: pass documents through unchanged while writing them.
+
+        Args:
+            documents: Source stage
+
+        Yields:
+            Document: The source's documents
+        """
+        for document in documents:
+            self.write(document)
+            yield document
+
+    def close(self) -> None:
+        """
+        Flush and close the fixture file.
+        """
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> 'FixtureRecorder':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def write_fixture(path: str, documents: Iterable[Document]) -> int:
+    """
+    Write documents to a fixture file.
+
+    Args:
+        path: Fixture file to create
+        documents: Documents to record
+
+    Returns:
+        int: Number of documents written
+    """
+    with FixtureRecorder(path) as recorder:
+        for document in documents:
+            recorder.write(document)
+        return recorder.count
+
+
+def iter_fixture_documents(path: str, subreddit_name: Optional[str] = None,
+                           start_date: Optional[date] = None,
+                           end_date: Optional[date] = None) -> Iterator[Document]:
+    """
+    Replay source: stream recorded documents from a fixture file.
+
+    Args:
+        path: Fixture file written by FixtureRecorder
+        subreddit_name: Only replay this subreddit's documents, all if None
+        start_date: First day to replay, all days if None
+        end_date: Last day to replay, inclusive, defaults to start_date
+
+    Yields:
+        Document: Recorded documents, in recording order
+    """
+    days = new_daily_counters(start_date, end_date or start_date) if start_date else None
+    with gzip.open(path, 'rt', encoding='utf-8') as fixture:
+        for line in fixture:
+            document = Document(**json.loads(line))
+            if subreddit_name is not None and document.subreddit != subreddit_name:
+                continue
+            if days is not None and day_counter(days, document.created_utc) is None:
+                continue
+            yield document
@@ -0,0 +1,228 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# File layout, little-endian:
+#   header       magic, subreddit count S, keyword count K, entry count N (uint32 each)
+#   names        uint32 byte length, then the S subreddit and K keyword names joined by
+#                newlines in UTF-8, zero-padded to a multiple of 4 bytes
+#   offsets      uint32[S + 1], entries of subreddit s are offsets[s]:offsets[s + 1]
+#   keyword_ids  uint32[N], index into the keyword names
+#   counts       uint32[N], mention counts
+MAGIC = b'RTS1'
+HEADER = struct.Struct('<4sIII')
+SNAPSHOT_FILE_NAME = 'trends.rts'
+
+
+def snapshot_key(prefix: str, snapshot_date: date) -> str:
+    """
+    Build the date-partitioned path of a day's snapshot file.
+
+    Args:
+        prefix: S3 key prefix or local directory holding the snapshots
+        snapshot_date: Day of the snapshot
+
+    Returns:
+        str: e.g. "<prefix>/date=2024-01-31/trends.rts"
+    """
+    return f"{prefix.rstrip('/')}/date={snapshot_date.isoformat()}/{SNAPSHOT_FILE_NAME}"
+
+
+def _uint32_array(values: Iterable[int]) -> array:
+    values = array('I', values)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def encode_snapshot(trends: Dict[str, Dict[str, int]]) -> bytes:
+    """
+    Encode a day's keyword mention counts as a compact columnar snapshot.
+
+    Args:
+        trends: Keyword mention counts per subreddit, as saved for one SNAPSHOT_DATE
+
+    Returns:
+        bytes: Snapshot file contents
+
+    Raises:
+        OverflowError: If a count does not fit in 32 bits
+    """
+    subreddits = sorted(trends)
+    keywords = sorted(set().union(*trends.values())) if trends else []
+    keyword_ids = {keyword: n for n, keyword in enumerate(keywords)}
+
+    offsets = [0]
+    ids: List[int] = []
+    counts: List[int] = []
+    for subreddit in subreddits:
+        for keyword, count in sorted(trends[subreddit].items()):
+            ids.append(keyword_ids[keyword])
+            counts.append(count)
+        offsets.append(len(ids))
+
+    names = '\n'.join(subreddits + keywords).encode('utf-8')
+    names += b'\0' * (-len(names) % 4)
+    return b''.join((HEADER.pack(MAGIC, len(subreddits), len(keywords), len(ids)),
+                     struct.pack('<I', len(names)), names,
+                     _uint32_array(offsets).tobytes(), _uint32_array(ids).tobytes(),
+                     _uint32_array(counts).tobytes()))
+
+
+def write_snapshot(path: str, trends: Dict[str, Dict[str, int]]) -> None:
+    """
+    Write a day's snapshot file, creating its partition directory.
+
+    Args:
+        path: Destination file, e.g. from snapshot_key()
+        trends: Keyword mention counts per subreddit
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(encode_snapshot(trends))
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """
+    Read-only view of a snapshot file, memory-mapped so only the pages read are loaded.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Snapshot file
+
+        Raises:
+            ValueError: If the file is not a snapshot
+        """
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, subreddit_count, keyword_count, entry_count = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a trend snapshot")
+
+        position = HEADER.size
+        (names_length,) = struct.unpack_from('<I', self._mmap, position)
+        position += 4
+        names = self._mmap[position:position + names_length].rstrip(b'\0').decode('utf-8')
+        names = names.split('\n') if names else []
+        position += names_length
+        self.subreddits: List[str] = names[:subreddit_count]
+        self.keywords: List[str] = names[subreddit_count:subreddit_count + keyword_count]
+
+        self._views: List[memoryview] = []
+        self.offsets = self._uint32_view(position, subreddit_count + 1)
+        position += 4 * (subreddit_count + 1)
+        self.keyword_ids = self._uint32_view(position, entry_count)
+        self.counts = self._uint32_view(position + 4 * entry_count, entry_count)
+
+    def _uint32_view(self, position: int, length: int):
+        if sys.byteorder != 'little':
+            values = array('I', self._mmap[position:position + 4 * length])
+            values.byteswap()
+            return values
+        view = memoryview(self._mmap)[position:position + 4 * length].cast('I')
+        self._views.append(view)
+        return view
+
+    def keyword_counts(self, subreddits: Optional[Iterable[str]] = None) -> Counter:
+        """
+        Sum mention counts per keyword.
+
+        Args:
+            subreddits: Subreddits to include, all by default
+
+        Returns:
+            Counter: Mention counts keyed by keyword
+        """
+        if subreddits is None:
+            ranges = [(0, len(self.counts))]
+        else:
+            index = {name: n for n, name in enumerate(self.subreddits)}
+            ranges = [(self.offsets[index[name]], self.offsets[index[name] + 1])
+                      for name in subreddits if name in index]
+
+        totals = [0] * len(self.keywords)
+        for start, end in ranges:
+            for keyword_id, count in zip(self.keyword_ids[start:end], self.counts[start:end]):
+                totals[keyword_id] += count
+        return Counter({keyword: total for keyword, total in zip(self.keywords, totals) if total})
+
+    def trends(self) -> Dict[str, Dict[str, int]]:
+        """
+        Decode the whole snapshot.
+
+        Returns:
+            Dict[str, Dict[str, int]]: Keyword mention counts per subreddit, as passed to encode_snapshot()
+        """
+        return {subreddit: {self.keywords[keyword_id]: count for keyword_id, count in
+                            zip(self.keyword_ids[start:end], self.counts[start:end])}
+                for subreddit, start, end in zip(self.subreddits, self.offsets, self.offsets[1:])}
+
+    def close(self) -> None:
+        """
+        Unmap the file.
+        """
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def iter_snapshots(root: str, start_date: date, end_date: date) -> Iterator[Tuple[date, Snapshot]]:
+    """
+    Open the snapshots of a date range from a local copy of the snapshot prefix.
+
+    Days without a snapshot file are skipped. Each snapshot is closed when
+    the iteration moves on.
+
+    Args:
+        root: Local directory laid out like the S3 prefix, e.g. from aws s3 sync
+        start_date: First day
+        end_date: Last day, inclusive
+
+    Yields:
+        Tuple[date, Snapshot]: Each day with a snapshot and its open snapshot
+    """
+    day = start_date
+    while day <= end_date:
+        path = snapshot_key(root, day)
+        if os.path.exists(path):
+            with Snapshot(path) as snapshot:
+                yield day, snapshot
+        day += timedelta(days=1)
+
+
+def aggregate_snapshots(root: str, start_date: date, end_date: date,
+                        subreddits: Optional[Iterable[str]] = None) -> Counter:
+    """
+    Total keyword mentions over a date range of local snapshots.
+
+    Args:
+        root: Local directory laid out like the S3 prefix
+        start_date: First day
+        end_date: Last day, inclusive
+        subreddits: Subreddits to include, all by default
+
+    Returns:
+        Counter: Mention counts keyed by keyword
+    """
+    subreddits = list(subreddits) if subreddits is not None else None
+    totals: Counter = Counter()
+    for _, snapshot in iter_snapshots(root, start_date, end_date):
+        totals.update(snapshot.keyword_counts(subreddits))
+    return totals
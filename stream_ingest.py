@@ -0,0 +1,256 @@
+import json
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from lambda_function import (cfg, get_boto3_client, get_reddit_connection, get_subreddit_names, load_keyword_matcher,
+                             load_stream_cursor_ids, post_documents, save_hourly_trends)
+from pipeline import Document, normalize_document
+from timing import span, timed_iter
+
+STREAM_KINDS = ('comment', 'submission')
+
+
+def hour_start(created_utc: float) -> datetime:
+    """
+    Truncate a UTC timestamp to the start of its hour.
+
+    Args:
+        created_utc: Creation time as a UTC timestamp
+
+    Returns:
+        datetime: Start of the hour, naive UTC as stored in TIMESTAMP_NTZ columns
+    """
+    return datetime.fromtimestamp(created_utc - created_utc % 3600, timezone.utc).replace(tzinfo=None)
+
+
+class HourlyAggregator:
+    """
+    Accumulates keyword hits into per-hour, per-subreddit Counters between flushes.
+    """
+
+    def __init__(self):
+        self.hourly_trends: Dict[Tuple[datetime, str], Counter] = {}
+        self.document_counts: Counter = Counter()
+
+    def add(self, document: Document, hits: set) -> None:
+        """
+        Count a document's keyword hits in the hour it was created.
+
+        Args:
+            document: Matched document
+            hits: Keywords found in the document
+        """
+        self.document_counts[document.kind] += 1
+        if hits:
+            self.hourly_trends.setdefault((hour_start(document.created_utc), document.subreddit), Counter()).update(hits)
+
+    def snapshot(self) -> Dict[Tuple[datetime, str], Dict[str, int]]:
+        """
+        Copy the counts gathered since the last clear.
+
+        Returns:
+            Dict[Tuple[datetime, str], Dict[str, int]]: Keyword mention counts per hour and subreddit
+        """
+        return {key: dict(counts) for key, counts in self.hourly_trends.items()}
+
+    def clear(self) -> None:
+        """
+        Forget the hourly counts once they are saved; document counts keep running.
+        """
+        self.hourly_trends = {}
+
+
+class StreamCursor:
+    """
+    Newest item seen on each stream, persisted between invocations.
+
+    Reddit ids are base-36 sequence numbers, so anything at or below the
+    stored id was counted by an earlier invocation. A new stream replays the
+    latest 100 items, which the cursor filters out. The cursor is committed
+    together with the hourly counts by save_hourly_trends().
+    """
+
+    def __init__(self, last_ids: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            last_ids: Newest id per stream kind, as stored by to_json()
+        """
+        self.last_ids = dict(last_ids or {})
+        # Ids as last committed, so an unchanged cursor is not written again
+        self.saved_ids = dict(self.last_ids)
+        self.skipped = 0
+
+    def advance(self, kind: str, item: Any) -> bool:
+        """
+        Move the cursor past an item.
+
+        Args:
+            kind: 'comment' or 'submission'
+            item: Item from the stream
+
+        Returns:
+            bool: False if the item was already counted
+        """
+        last_id = self.last_ids.get(kind)
+        if last_id is not None and int(item.id, 36) <= int(last_id, 36):
+            self.skipped += 1
+            return False
+        self.last_ids[kind] = item.id
+        return True
+
+    def to_json(self) -> str:
+        """
+        Serialize the cursor for storage.
+
+        Returns:
+            str: JSON document
+        """
+        return json.dumps({'last_ids': self.last_ids})
+
+
+def load_stream_cursor() -> StreamCursor:
+    """
+    Load the stream cursor from REDDIT_STREAM_CURSOR.
+
+    Before the first flush, falls back to the S3 cursor at STREAM_CURSOR_KEY
+    that earlier versions kept, so upgrading does not count the replayed
+    items again.
+
+    Returns:
+        StreamCursor: The stored cursor, or an empty one on the first run
+    """
+    with span('stream_cursor_load'):
+        last_ids = load_stream_cursor_ids()
+    if last_ids:
+        print(f"Loaded stream cursor {last_ids}")
+        return StreamCursor(last_ids)
+
+    key = getattr(cfg, 'STREAM_CURSOR_KEY', None)
+    if not key:
+        print("No stream cursor in REDDIT_STREAM_CURSOR, starting a new one")
+        return StreamCursor()
+    try:
+        with span('stream_cursor_load'):
+            obj = get_boto3_client('s3').get_object(Bucket=cfg.BUCKET_NAME, Key=key)
+            cursor = StreamCursor(json.loads(obj['Body'].read())['last_ids'])
+        print(f"Loaded stream cursor {cursor.last_ids} from s3://{cfg.BUCKET_NAME}/{key}")
+        # Not saved yet, so the first flush writes it to REDDIT_STREAM_CURSOR even without new items
+        cursor.saved_ids = {}
+        return cursor
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'NoSuchKey':
+            raise
+        print(f"No stream cursor at s3://{cfg.BUCKET_NAME}/{key}, starting a new one")
+        return StreamCursor()
+
+
+def stream_documents(kind: str, item: Any, subreddit_name: str) -> List[Document]:
+    """
+    Turn a streamed comment or submission into pipeline documents.
+
+    Args:
+        kind: 'comment' or 'submission'
+        item: Item from the stream
+        subreddit_name: Configured name of the item's subreddit
+
+    Returns:
+        List[Document]: The comment body, or the submission's title and selftext
+    """
+    if kind == 'submission':
+        return post_documents(item, subreddit_name)
+    return [Document('comment', item.id, subreddit_name, item.created_utc, getattr(item, 'body', ""))]
+
+
+def flush(aggregator: HourlyAggregator, cursor: StreamCursor, hours: set) -> None:
+    # Counts are added to the hourly rows and committed with the cursor past them, so
+    # they are only cleared once the transaction is, and a failed flush is retried whole
+    hourly_trends = aggregator.snapshot()
+    if hourly_trends or cursor.last_ids != cursor.saved_ids:
+        save_hourly_trends(hourly_trends, cursor.last_ids)
+        cursor.saved_ids = dict(cursor.last_ids)
+        aggregator.clear()
+        hours.update(hour for hour, _ in hourly_trends)
+
+
+def run_stream_ingest(run_seconds: float) -> Dict[str, Any]:
+    """
+    Count keyword mentions in the live comment and submission streams of the tracked subreddits.
+
+    Meant for a frequent schedule (e.g. every 5 minutes): each invocation
+    polls both streams of all SUBREDDIT_NAMES for up to run_seconds, pausing
+    STREAM_POLL_SECONDS whenever neither has new items, so requests are spread
+    evenly over the day instead of arriving as one burst at snapshot time.
+    Every document is matched as it arrives and counted in the UTC hour it was
+    created; counts are added to REDDIT_TRENDS_HOURLY every STREAM_FLUSH_SECONDS
+    and when time runs out. Unlike the daily crawl, every comment is counted,
+    not only the top comments of each post.
+
+    Invocations must not overlap: two running at once would start from the
+    same cursor and count the same items twice, so the function needs a
+    reserved concurrency of 1, or a schedule longer than STREAM_RUN_SECONDS.
+
+    Args:
+        run_seconds: Time budget for consuming the streams
+
+    Returns:
+        Dict[str, Any]: Documents counted by kind, items skipped as already counted, and hours flushed
+    """
+    deadline = time.monotonic() + run_seconds
+    flush_seconds = getattr(cfg, 'STREAM_FLUSH_SECONDS', 60)
+    poll_seconds = getattr(cfg, 'STREAM_POLL_SECONDS', 5)
+
+    subreddit_names = get_subreddit_names()
+    # Streams report Reddit's capitalization; count under the configured names
+    names = {name.lower(): name for name in subreddit_names}
+    matcher = load_keyword_matcher()
+    reddit = get_reddit_connection()
+    cursor = load_stream_cursor()
+    subreddit = reddit.subreddit('+'.join(subreddit_names))
+    # pause_after=-1 yields None after every request without new items, so both streams can be polled in turn
+    streams = {
+        'comment': timed_iter('stream_comments', subreddit.stream.comments(pause_after=-1)),
+        'submission': timed_iter('stream_submissions', subreddit.stream.submissions(pause_after=-1)),
+    }
+
+    aggregator = HourlyAggregator()
+    hours: set = set()
+    next_flush = time.monotonic() + flush_seconds
+    try:
+        while time.monotonic() < deadline:
+            found = 0
+            for kind in STREAM_KINDS:
+                for item in streams[kind]:
+                    if item is None:
+                        break
+                    found += 1
+                    if not cursor.advance(kind, item):
+                        continue
+                    display_name = item.subreddit.display_name
+                    for document in stream_documents(kind, item, names.get(display_name.lower(), display_name)):
+                        document = normalize_document(document)
+                        with span('matching'):
+                            hits = matcher.find(document.text)
+                        aggregator.add(document, hits)
+                    if time.monotonic() >= deadline:
+                        break
+
+            if time.monotonic() >= next_flush:
+                flush(aggregator, cursor, hours)
+                next_flush = time.monotonic() + flush_seconds
+            if not found:
+                time.sleep(max(0.0, min(poll_seconds, deadline - time.monotonic())))
+    finally:
+        flush(aggregator, cursor, hours)
+
+    counts = aggregator.document_counts
+    print(f"Streamed {counts['title']} posts and {counts['comment']} comments from {len(subreddit_names)} subreddits, "
+          f"{cursor.skipped} items already counted")
+    return {
+        'documents_processed': dict(counts),
+        'items_skipped': cursor.skipped,
+        'hours_flushed': [str(hour) for hour in sorted(hours)],
+    }
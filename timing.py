@@ -0,0 +1,179 @@
+import functools
+import json
+import threading
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional
+
+
+class Timings:
+    """
+    Per-invocation collector of named durations.
+
+    Durations come from a monotonic clock and accumulate per name, so a span
+    entered many times (one per comment fetch, listing page or matched
+    document) reports its total time and count. Safe to share between threads;
+    spans in concurrent threads add up to more than wall time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, list] = {}
+
+    def reset(self) -> None:
+        """
+        Drop everything recorded so far, e.g. at the start of an invocation.
+        """
+        with self._lock:
+            self._totals = {}
+
+    def add(self, name: str, seconds: float, count: int = 1) -> None:
+        """
+        Record a duration.
+
+        Args:
+            name: Span name
+            seconds: Duration in seconds
+            count: Number of operations the duration covers
+        """
+        with self._lock:
+            totals = self._totals.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += count
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize the recorded spans.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Total milliseconds and count per span name
+        """
+        with self._lock:
+            return {name: {'ms': round(seconds * 1000, 3), 'count': count}
+                    for name, (seconds, count) in sorted(self._totals.items())}
+
+
+TIMINGS = Timings()
+
+
+class span:
+    """
+    Time a block into TIMINGS.
+
+    Usable as a context manager (``with span('secrets'):``) or a decorator
+    (``@span('secrets')``). The elapsed seconds are available on the span
+    after the block exits.
+    """
+    __slots__ = ('name', 'timings', 'elapsed', '_start')
+
+    def __init__(self, name: str, timings: Optional[Timings] = None):
+        """
+        Args:
+            name: Span name the duration is recorded under
+            timings: Collector to record into, defaults to TIMINGS
+        """
+        self.name = name
+        self.timings = timings or TIMINGS
+        self.elapsed = 0.0
+
+    def __enter__(self) -> 'span':
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.elapsed = time.perf_counter() - self._start
+        self.timings.add(self.name, self.elapsed)
+
+    def __call__(self, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(self.name, self.timings):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def timed_iter(name: str, iterable: Iterable[Any], timings: Optional[Timings] = None) -> Iterator[Any]:
+    """
+    Time each step of an iterator, e.g. a lazily paged API listing.
+
+    Only the time spent producing items is recorded, not the time the
+    consumer spends between them.
+
+    Args:
+        name: Span name the durations are recorded under
+        iterable: Iterable to time
+        timings: Collector to record into, defaults to TIMINGS
+
+    Yields:
+        Any: Items of the iterable
+    """
+    timings = timings or TIMINGS
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            timings.add(name, time.perf_counter() - start, 0)
+            return
+        timings.add(name, time.perf_counter() - start)
+        yield item
+
+
+async def timed_aiter(name: str, iterable: AsyncIterable[Any],
+                      timings: Optional[Timings] = None) -> AsyncIterator[Any]:
+    """
+    Async counterpart of timed_iter, e.g. for asyncpraw listings.
+
+    Args:
+        name: Span name the durations are recorded under
+        iterable: Async iterable to time
+        timings: Collector to record into, defaults to TIMINGS
+
+    Yields:
+        Any: Items of the iterable
+    """
+    timings = timings or TIMINGS
+    iterator = iterable.__aiter__()
+    while True:
+        start = time.perf_counter()
+        try:
+            item = await iterator.__anext__()
+        except StopAsyncIteration:
+            timings.add(name, time.perf_counter() - start, 0)
+            return
+        timings.add(name, time.perf_counter() - start)
+        yield item
+
+
+def emf_record(timings: Dict[str, Dict[str, float]], namespace: str,
+               dimensions: Dict[str, str], properties: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Render span timings as one CloudWatch Embedded Metric Format log line.
+
+    Each span becomes a "<name>_ms" metric; CloudWatch extracts the metrics
+    from the log line, and the whole record stays queryable in Logs Insights.
+
+    Args:
+        timings: Output of Timings.snapshot()
+        namespace: CloudWatch metrics namespace
+        dimensions: Dimension names and values for every metric
+        properties: Extra fields logged with the record, not extracted as metrics
+
+    Returns:
+        str: JSON document to print to the function's log
+    """
+    record: Dict[str, Any] = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': namespace,
+                'Dimensions': [sorted(dimensions)],
+                'Metrics': [{'Name': f"{name}_ms", 'Unit': 'Milliseconds'} for name in timings],
+            }],
+        },
+    }
+    record.update(dimensions)
+    record.update(properties or {})
+    record.update({f"{name}_ms": values['ms'] for name, values in timings.items()})
+    record['spans'] = timings
+    return json.dumps(record, default=str)
@@ -0,0 +1,149 @@
+import json
+import math
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+
+class TrendState:
+    """
+    Exponentially weighted mean and variance of daily mentions per subreddit and keyword.
+
+    Each day updates every tracked keyword once, counting unmentioned keywords
+    as zero, so detecting a spike costs O(keywords) per day and never rescans
+    history. Days are applied in order: a day at or before the last one
+    applied is ignored, which keeps re-runs from counting a day twice, and
+    missing days in between are applied as days without mentions.
+    """
+
+    def __init__(self, alpha: float = 0.1, last_date: Optional[date] = None,
+                 keywords: Optional[Dict[str, Dict[str, List[float]]]] = None,
+                 days: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            alpha: Weight of the newest day, 2 / (span + 1) for a span of days
+            last_date: Last day applied, None before the first run
+            keywords: [mean, variance] per subreddit and keyword, as stored by to_json()
+            days: Days applied per subreddit
+        """
+        self.alpha = alpha
+        self.last_date = last_date
+        self.keywords = keywords or {}
+        self.days = days or {}
+
+    def update(self, snapshot_date: date, trends: Dict[str, Dict[str, int]], z_threshold: float = 3.0,
+               min_mentions: int = 5, warmup_days: int = 7) -> List[Dict[str, Any]]:
+        """
+        Apply a day's counts and report the keywords spiking that day.
+
+        A keyword spikes when its count is at least min_mentions and
+        z_threshold standard deviations above its mean before the day; keywords
+        not tracked yet have a baseline of zero. Subreddits tracked for fewer
+        than warmup_days have no meaningful baseline yet and report nothing.
+
+        Args:
+            snapshot_date: Day of the counts
+            trends: Keyword mention counts per subreddit
+            z_threshold: Z-score at which a keyword counts as spiking
+            min_mentions: Fewest mentions for a spike
+            warmup_days: Days a subreddit is tracked before its keywords can spike
+
+        Returns:
+            List[Dict[str, Any]]: Spiking keywords, highest z-score first; empty if the day was already applied
+        """
+        if self.last_date is not None and snapshot_date <= self.last_date:
+            print(f"Trend state already includes {snapshot_date}, skipping")
+            return []
+        if self.last_date is not None:
+            # Days without counts, e.g. a failed run, still decay the averages; a year decays everything
+            gap = (snapshot_date - self.last_date).days - 1
+            for _ in range(min(gap, 366)):
+                self._apply({})
+
+        spikes = []
+        for subreddit, counts in trends.items():
+            if self.days.get(subreddit, 0) < warmup_days:
+                continue
+            tracked = self.keywords.get(subreddit, {})
+            for keyword, count in counts.items():
+                if count < min_mentions:
+                    continue
+                mean, variance = tracked.get(keyword, (0.0, 0.0))
+                # Floor the deviation so a keyword that was flat at zero needs real volume to spike
+                z_score = (count - mean) / math.sqrt(max(variance, 1.0))
+                if z_score >= z_threshold:
+                    spikes.append({'date': str(snapshot_date), 'subreddit': subreddit, 'keyword': keyword,
+                                   'mention_count': count, 'mean': round(mean, 2), 'z_score': round(z_score, 2)})
+
+        self._apply(trends)
+        self.last_date = snapshot_date
+        spikes.sort(key=lambda spike: -spike['z_score'])
+        return spikes
+
+    def _apply(self, trends: Dict[str, Dict[str, int]]) -> None:
+        alpha = self.alpha
+        for subreddit in set(self.days) | set(trends):
+            self.days[subreddit] = self.days.get(subreddit, 0) + 1
+            tracked = self.keywords.setdefault(subreddit, {})
+            counts = trends.get(subreddit, {})
+            for keyword in set(tracked) | set(counts):
+                mean, variance = tracked.get(keyword, (0.0, 0.0))
+                diff = counts.get(keyword, 0) - mean
+                increment = alpha * diff
+                mean += increment
+                variance = (1 - alpha) * (variance + diff * increment)
+                if mean < 0.01 and keyword not in counts:
+                    # Decayed to nothing; drop it so the state tracks only live keywords
+                    del tracked[keyword]
+                    continue
+                tracked[keyword] = [mean, variance]
+
+    def to_json(self) -> str:
+        """
+        Serialize the state for storage.
+
+        Returns:
+            str: JSON document
+        """
+        return json.dumps({'alpha': self.alpha, 'last_date': self.last_date and str(self.last_date),
+                           'keywords': self.keywords, 'days': self.days})
+
+    @classmethod
+    def from_json(cls, document: str, alpha: Optional[float] = None) -> 'TrendState':
+        """
+        Restore a stored state.
+
+        Args:
+            document: JSON written by to_json()
+            alpha: Weight to continue with, defaults to the stored one
+
+        Returns:
+            TrendState: The restored state
+        """
+        stored = json.loads(document)
+        last_date = date.fromisoformat(stored['last_date']) if stored.get('last_date') else None
+        return cls(alpha if alpha is not None else stored['alpha'], last_date, stored['keywords'], stored['days'])
+
+
+def detect_spikes(state: TrendState, trends_data: Dict[date, Dict[str, Dict[str, int]]],
+                  z_threshold: float = 3.0, min_mentions: int = 5, warmup_days: int = 7,
+                  top_n: int = 20) -> List[Dict[str, Any]]:
+    """
+    Advance the trend state over a run's days and rank the spiking keywords.
+
+    Args:
+        state: Trend state to update in place
+        trends_data: Keyword mention counts per snapshot date and subreddit
+        z_threshold: Z-score at which a keyword counts as spiking
+        min_mentions: Fewest mentions for a spike
+        warmup_days: Days a subreddit is tracked before its keywords can spike
+        top_n: Longest list returned
+
+    Returns:
+        List[Dict[str, Any]]: Spiking keywords of every day, highest z-score first
+    """
+    spikes = []
+    for snapshot_date in sorted(trends_data):
+        spikes.extend(state.update(snapshot_date, trends_data[snapshot_date], z_threshold, min_mentions,
+                                   warmup_days))
+    spikes.sort(key=lambda spike: -spike['z_score'])
+    return spikes[:top_n]